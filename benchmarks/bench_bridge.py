@@ -0,0 +1,244 @@
+"""Round trip cost of bridge calls, event emission and binding generation.
+
+Drives `WebView.on_invoke` and `WebView.on_invoke_reply` through a headless
+stand-in for the WebView, so no display or web process is needed. Every call
+is sent as a real Invoke message and counts as finished when its result
+reaches the fake view, either as a `wito._deliver(...)` evaluation or as a
+script message reply.
+
+Run from the repository root:
+    python benchmarks/bench_bridge.py
+    python benchmarks/bench_bridge.py --transport reply --calls 5000
+    python benchmarks/bench_bridge.py --batch 10 --output baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gi
+gi.require_version('JavaScriptCore', '6.0')
+from gi.repository import GLib, JavaScriptCore
+from wito.core import WebView
+from wito.interface import API
+from wito.utils import wito_base_path
+from wito.bindings import cached_members
+
+
+DELIVER_PREFIX = 'wito._deliver('
+LARGE_ROWS = [{"id": i, "name": f"item-{i}", "price": i * 1.25, "tags": ["a", "b"]} for i in range(5000)]
+
+
+class BenchAPI(API):
+    @API.expose
+    def small(self, value):
+        return value
+
+    @API.expose
+    def large(self):
+        return LARGE_ROWS
+
+    @API.expose
+    @API.thread
+    def threaded(self, value):
+        return value
+
+    @API.expose
+    def error(self):
+        raise ValueError("expected failure")
+
+
+class FakeWindow:
+    def connect(self, *args):
+        pass
+
+
+class FakeContentManager:
+    def __init__(self):
+        self.scripts = []
+
+    def add_script(self, script):
+        self.scripts.append(script)
+
+
+class FakeReply:
+    def __init__(self, view, call_ids):
+        self.view = view
+        self.call_ids = call_ids
+
+    def return_value(self, value):
+        self.view.finish(self.call_ids)
+
+    def return_error_message(self, message):
+        self.view.finish(self.call_ids)
+
+
+class HeadlessWebView:
+    """Just enough of WebView to run its Invoke handlers without a display."""
+
+    on_invoke = WebView.on_invoke
+    on_invoke_reply = WebView.on_invoke_reply
+    on_control = WebView.on_control
+    dispatch = WebView.dispatch
+    when_settled = WebView.when_settled
+    reply_value = WebView.reply_value
+    handle_future = WebView.handle_future
+    send_response = WebView.send_response
+    send_error = WebView.send_error
+    inject_bindings = WebView.inject_bindings
+
+    def __init__(self, transport):
+        self.wito_config = {"transport": transport, "version": "bench", "bindingsCache": False}
+        self.transport = transport
+        self.dev_mode = False
+        self.wito_dev_mode = False
+        self.generate_bindings = True
+        self.batch_calls = False
+        self.stream_window = 16
+        self.wito_base_path = wito_base_path()
+        self.content_manager = FakeContentManager()
+        self.js_context = JavaScriptCore.Context.new()
+        self.finished = {}
+        self.evaluations = 0
+        self.api = BenchAPI(self, FakeWindow(), "bench", False)
+
+    def is_loading(self):
+        return False
+
+    def get_user_content_manager(self):
+        return self.content_manager
+
+    def evaluate_javascript(self, js, length, world, source_uri, cancellable=None, callback=None):
+        self.evaluations += 1
+        if js.startswith(DELIVER_PREFIX):
+            items = json.loads(js[len(DELIVER_PREFIX):-1])
+            self.finish(target for kind, target, value in items if kind in ('r', 'e'))
+
+    def finish(self, call_ids):
+        now = time.perf_counter()
+        for call_id in call_ids:
+            self.finished[call_id] = now
+
+    def send(self, message, call_ids):
+        value = JavaScriptCore.Value.new_string(self.js_context, message)
+        if self.transport == "reply":
+            self.on_invoke_reply(None, value, FakeReply(self, call_ids))
+        else:
+            self.on_invoke(None, value)
+
+
+def run_loop_until(predicate, timeout=30):
+    context = GLib.MainContext.default()
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Calls did not finish in time")
+        context.iteration(True)
+
+
+def run_calls(view, method, args, calls, batch):
+    """Send `calls` calls in groups of `batch`, waiting for each group to finish."""
+    latencies = []
+    call_id = 0
+    start = time.perf_counter()
+    while call_id < calls:
+        ids = list(range(call_id, min(call_id + batch, calls)))
+        call_id += len(ids)
+        messages = [{"id": i, "method": method, "args": args} for i in ids]
+        message = json.dumps(messages[0] if batch == 1 else {"batch": messages})
+        sent = time.perf_counter()
+        view.send(message, ids)
+        run_loop_until(lambda: all(i in view.finished for i in ids))
+        latencies.extend(view.finished.pop(i) - sent for i in ids)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "calls_per_sec": calls / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+    }
+
+
+def measure_allocations(view, method, args, calls, batch):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    run_calls(view, method, args, calls, batch)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+    return {"alloc_kb_per_call": allocated / calls / 1024, "peak_kb": peak / 1024}
+
+
+def bench_calls(transport, calls, batch):
+    view = HeadlessWebView(transport)
+    cases = [
+        ("small", "small", {"value": "hello"}, calls),
+        ("large", "large", {}, max(calls // 50, 10)),
+        ("threaded", "threaded", {"value": 1}, calls),
+        ("error", "error", {}, calls),
+    ]
+    print(f"\ntransport={transport} batch={batch}")
+    print(f"{'case':<10} {'calls/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'KB/call':>9} {'peak KB':>9}")
+    results = {}
+    for name, method, args, count in cases:
+        run_calls(view, method, args, min(count, 50), batch)
+        timing = run_calls(view, method, args, count, batch)
+        memory = measure_allocations(view, method, args, max(count // 10, 1), batch)
+        print(f"{name:<10} {timing['calls_per_sec']:>10.0f} {timing['p50_ms']:>9.3f} {timing['p99_ms']:>9.3f} "
+              f"{memory['alloc_kb_per_call']:>9.2f} {memory['peak_kb']:>9.0f}")
+        results[name] = {**timing, **memory}
+    return results
+
+
+def bench_events(count):
+    view = HeadlessWebView("eval")
+    start = time.perf_counter()
+    for i in range(count):
+        view.api.emit_event('progress', {"value": i})
+    run_loop_until(lambda: not view.api.delivery_queue and not view.api.delivery_scheduled)
+    elapsed = time.perf_counter() - start
+    print(f"\nevents     {count / elapsed:>10.0f} events/s in {view.evaluations} evaluations")
+    return {"events_per_sec": count / elapsed, "evaluations": view.evaluations}
+
+
+def bench_bindings(repeat):
+    view = HeadlessWebView("eval")
+    results = {}
+    js_path = os.path.join(view.wito_base_path, 'js')
+    for name, lazy, cache in (("generated", False, False), ("lazy", True, False), ("cached", False, True)):
+        cached_members(view.api, js_path, "bench", lazy, cache)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            view.api.members = cached_members(view.api, js_path, "bench", lazy, cache)
+            view.inject_bindings()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"bindings   {elapsed * 1000:>10.2f} ms per injection, {name}")
+        results[name] = {"ms_per_injection": elapsed * 1000}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bridge round trips through a headless WebView stand-in.")
+    parser.add_argument('--transport', choices=('eval', 'reply', 'both'), default='both')
+    parser.add_argument('--calls', type=int, default=2000, help="calls per case")
+    parser.add_argument('--batch', type=int, default=1, help="calls sent per Invoke message")
+    parser.add_argument('--output', help="write the results as JSON to compare against later runs")
+    args = parser.parse_args(argv)
+
+    transports = ('eval', 'reply') if args.transport == 'both' else (args.transport,)
+    results = {"batch": args.batch}
+    for transport in transports:
+        results[transport] = bench_calls(transport, args.calls, args.batch)
+    results["events"] = bench_events(args.calls * 10)
+    results["bindings"] = bench_bindings(20)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
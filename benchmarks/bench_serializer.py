@@ -0,0 +1,56 @@
+"""Serializer throughput on large bridge results.
+
+Run from the repository root:
+    python benchmarks/bench_serializer.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from wito.serializer import Serializer, orjson
+
+
+def plain_rows(count):
+    return [
+        {"id": i, "name": f"item-{i}", "price": i * 1.25, "tags": ["a", "b", "c"], "active": i % 2 == 0}
+        for i in range(count)
+    ]
+
+
+def rich_rows(count):
+    return [
+        {"id": i, "created": datetime(2024, 1, 1, 12, i % 60), "price": Decimal("9.99"), "tags": {"a", "b"}}
+        for i in range(count)
+    ]
+
+
+def measure(serializer, payload, repeat):
+    encoded = serializer.dumps(payload)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serializer.dumps(payload)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, len(encoded)
+
+
+def main():
+    backends = ["json"] + (["orjson"] if orjson else [])
+    cases = [
+        ("plain 100k rows", plain_rows(100_000), 5),
+        ("rich 20k rows", rich_rows(20_000), 5),
+    ]
+    print(f"{'case':<18} {'backend':<8} {'ms/call':>10} {'MB/s':>10}")
+    for name, payload, repeat in cases:
+        for backend in backends:
+            serializer = Serializer(backend=backend)
+            elapsed, size = measure(serializer, payload, repeat)
+            print(f"{name:<18} {backend:<8} {elapsed * 1000:>10.1f} {size / elapsed / 1e6:>10.1f}")
+    if not orjson:
+        print("orjson is not installed, only the json backend was measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the asyncio event loop shared by every coroutine method.
+
+    The loop is started on first use and runs forever on a daemon thread, so
+    it never competes with the GTK main loop for the main thread. Results are
+    handed back to the main loop through `concurrent.futures.Future` objects.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="wito-asyncio", daemon=True).start()
+        return _loop
+
+
+def submit(coroutine):
+    """Schedule a coroutine on the shared loop, returning a concurrent Future.
+
+    Cancelling the Future cancels the asyncio task running the coroutine.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop())
@@ -0,0 +1,231 @@
+import threading
+from fnmatch import fnmatch
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class CachedAsset:
+    mtime_ns: int
+    size: int
+    content_type: str
+    data: bytes
+
+
+@dataclass
+class AssetResponse:
+    """Everything needed to answer a wito:// request.
+
+    Built off the main thread when async serving is enabled and turned into a
+    `WebKit.URISchemeResponse` on the main thread. `body` is either bytes or a
+    `Gio.InputStream` with an explicit `length`; `error` marks a failed lookup.
+    """
+    status: int
+    content_type: Optional[str] = None
+    body: Any = b''
+    length: Optional[int] = None
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class AssetCache:
+    """Bounded LRU cache for files served over the wito:// scheme.
+
+    Entries are keyed by resolved file path and validated against the
+    file's mtime and size on every lookup, so a changed file is never
+    served stale. The cache is bounded by a total byte budget; files larger
+    than `max_entry_bytes` are never cached.
+
+    Example:
+        ```python
+        cache = AssetCache(max_bytes=32 * 1024 * 1024)
+        print(cache.stats())
+        ```
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_bytes=DEFAULT_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a cache from the `assetCache` config value, None if disabled."""
+        if config is False:
+            return None
+        config = config if isinstance(config, dict) else {}
+        if not config.get("enabled", True):
+            return None
+        return cls(
+            config.get("maxBytes", DEFAULT_MAX_BYTES),
+            config.get("maxEntryBytes", DEFAULT_MAX_ENTRY_BYTES))
+
+    def get(self, path, stat):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+                self._remove(path)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry
+
+    def put(self, path, stat, content_type, data):
+        size = len(data)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = CachedAsset(stat.st_mtime_ns, stat.st_size, content_type, data)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, path=None):
+        """Drop a single path, or every entry when no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+            elif path in self._entries:
+                self._remove(path)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _remove(self, path):
+        entry = self._entries.pop(path)
+        self.current_bytes -= len(entry.data)
+
+
+RANGE_CHUNK_BYTES = 8 * 1024 * 1024
+RANGE_NOT_SATISFIABLE = object()
+
+
+def parse_range(header, size, max_length=RANGE_CHUNK_BYTES):
+    """Parse a single-range HTTP `Range` header against a file size.
+
+    Returns an inclusive `(start, end)` tuple, None when the header is absent
+    or should be ignored (multiple ranges, unknown unit, malformed), or
+    `RANGE_NOT_SATISFIABLE` when the range lies outside the file. The range is
+    clamped to `max_length` bytes so partial responses use constant memory;
+    clients continue with a follow-up request from the returned
+    `Content-Range`.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.strip().partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            suffix = int(last)
+            if suffix == 0:
+                return RANGE_NOT_SATISFIABLE
+            start = max(size - suffix, 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start < 0:
+        return None
+    # Checked before end < start, an open range such as bytes=200- past the end is unsatisfiable
+    if start >= size:
+        return RANGE_NOT_SATISFIABLE
+    if end < start:
+        return None
+    end = min(end, size - 1, start + max_length - 1)
+    return start, end
+
+
+CONDITIONAL_HEADERS = ('Range', 'If-None-Match', 'If-Modified-Since')
+DEFAULT_CACHE_CONTROL = 'no-cache'
+
+
+class CachePolicy:
+    """Maps request paths to `Cache-Control` values.
+
+    Rules come from the `cacheControl` config object, patterns are matched
+    with fnmatch in declaration order and the first match wins. Paths without
+    a match get `no-cache`, so the page always revalidates and gets a cheap
+    304 when nothing changed.
+
+    Example:
+        ```python
+        policy = CachePolicy({"*.woff2": "max-age=31536000, immutable", "*.js": "max-age=3600"})
+        policy.cache_control("fonts/inter.woff2")
+        ```
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list((rules or {}).items())
+
+    def cache_control(self, path):
+        for pattern, value in self.rules:
+            if fnmatch(path, pattern):
+                return value
+        return DEFAULT_CACHE_CONTROL
+
+
+def validators(etag, mtime, cache_control):
+    """Response headers carrying the validators for a resource."""
+    return [
+        ('ETag', f'"{etag}"'),
+        ('Last-Modified', formatdate(mtime, usegmt=True)),
+        ('Cache-Control', cache_control)
+    ]
+
+
+def is_not_modified(request_headers, etag, mtime):
+    """Check revalidation headers against a resource's ETag and mtime.
+
+    `If-None-Match` takes precedence over `If-Modified-Since` as in RFC 9110.
+    """
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match:
+        tags = [tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+
+    if_modified_since = request_headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
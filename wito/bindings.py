@@ -0,0 +1,189 @@
+"""Generation and caching of the JavaScript bindings script.
+
+The API instance is scanned once when it is created. The same scan feeds
+method registration on the bridge and the generated `wito.js` bindings.
+The scan result and the generated script are cached on disk, keyed by the
+source files of the API class and its bases, the wito version and the
+templates, so later launches skip both the scan and the generation.
+"""
+import os
+import sys
+import json
+import inspect
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from gi.repository import GLib
+from wito.log import get_logger
+from wito.utils import app_base_path
+
+
+log = get_logger('bridge')
+WITO_PATH = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES = ('interface.js', 'method_template.js', 'property_template.js', 'stream_template.js')
+
+
+@dataclass
+class ExposedMethod:
+    name: str
+    method: Callable
+    params: List[str]
+    is_stream: bool
+    signature: Optional[inspect.Signature] = None
+
+
+@dataclass
+class Members:
+    """Exposed methods, routes and exposed properties of an API instance."""
+    methods: List[ExposedMethod]
+    routes: Dict[str, Callable]
+    properties: List[str]
+    script: Optional[str] = None
+
+
+def introspect(api):
+    """Scan `api` once for exposed methods, routes and exposed properties."""
+    methods = []
+    routes = {}
+    for name, method in inspect.getmembers(api, inspect.ismethod):
+        if hasattr(method, '_exposed'):
+            try:
+                signature = inspect.signature(method)
+            except ValueError as e:
+                log.error("Error processing method %s: %s", name, e)
+                continue
+            # Generator methods are consumed with for await in JavaScript
+            is_stream = inspect.isgeneratorfunction(method) or inspect.isasyncgenfunction(method)
+            methods.append(ExposedMethod(name, method, list(signature.parameters), is_stream, signature))
+        if hasattr(method, '_route'):
+            routes[method._route] = method
+
+    properties = [
+        name for name, prop in inspect.getmembers(type(api), lambda o: isinstance(o, property))
+        if hasattr(prop.fget, '_exposed')]
+    return Members(methods, routes, properties)
+
+
+def _read_template(js_path, name):
+    with open(os.path.join(js_path, name), 'r') as file:
+        return file.read()
+
+
+def generate(members, js_path, lazy=False):
+    """Build the bindings script, leaving the config placeholders in place."""
+    interface_js = _read_template(js_path, 'interface.js')
+    property_template = _read_template(js_path, 'property_template.js')
+    property_bindings = [property_template.replace('PROP_NAME', name) for name in members.properties]
+
+    if lazy:
+        # Methods are created on first access by the Proxy in interface.js
+        lazy_methods = {
+            method.name: [method.params, method.is_stream] for method in members.methods}
+        method_bindings = []
+    else:
+        lazy_methods = None
+        method_template = _read_template(js_path, 'method_template.js')
+        stream_template = _read_template(js_path, 'stream_template.js')
+        method_bindings = []
+        for method in members.methods:
+            params = method.params
+            template = stream_template if method.is_stream else method_template
+            method_bindings.append(template
+                .replace('METHOD_NAME', method.name)
+                .replace('PARAMS', ', '.join(params))
+                .replace('ARGS_OBJECT', ', '.join(f"{name}: {name}" for name in params))
+                .replace('PARAM_COUNT', str(len(params))))
+
+    return interface_js\
+        .replace('// METHOD_BINDINGS_PLACEHOLDER', '\n'.join(method_bindings))\
+        .replace('// PROPERTY_BINDINGS_PLACEHOLDER', '\n'.join(property_bindings))\
+        .replace('// LAZY_METHODS_PLACEHOLDER', json.dumps(lazy_methods))
+
+
+def cache_key(api_class, js_path, version, lazy):
+    """Hash of everything the scan and the generated bindings depend on.
+
+    Source files are identified by path, modification time and size, so
+    computing the key does not read them. The wito sources are included as
+    the application version does not change when wito is updated.
+    """
+    digest = hashlib.sha256(f"{version}:{lazy}".encode())
+    with os.scandir(WITO_PATH) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name.endswith('.py'):
+                stat = entry.stat()
+                digest.update(f"{entry.name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    for cls in api_class.__mro__:
+        digest.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+        source = getattr(sys.modules.get(cls.__module__), '__file__', None)
+        if source:
+            stat = os.stat(source)
+            digest.update(f"{source}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    for name in TEMPLATES:
+        stat = os.stat(os.path.join(js_path, name))
+        digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()
+
+
+def cache_dir():
+    """Cache directory of the running application, apps sharing an API class name get their own."""
+    app_key = hashlib.sha256(app_base_path().encode()).hexdigest()[:16]
+    return os.path.join(GLib.get_user_cache_dir(), 'wito', 'bindings', app_key)
+
+
+def _dump(members):
+    return json.dumps({
+        "methods": [[method.name, method.params, method.is_stream] for method in members.methods],
+        "routes": {route: method.__name__ for route, method in members.routes.items()},
+        "properties": members.properties,
+        "script": members.script
+    })
+
+
+def _load(api, data):
+    methods = [ExposedMethod(name, getattr(api, name), params, is_stream)
+               for name, params, is_stream in data["methods"]]
+    routes = {route: getattr(api, name) for route, name in data["routes"].items()}
+    return Members(methods, routes, data["properties"], data["script"])
+
+
+def cached_members(api, js_path, version, lazy=False, use_cache=True):
+    """Scan `api` and build its bindings script, from the disk cache when possible.
+
+    Returns Members with `script` set. Each API class keeps a single cache
+    file, older versions of it are removed when a new one is written.
+    """
+    if not use_cache:
+        members = introspect(api)
+        members.script = generate(members, js_path, lazy)
+        return members
+
+    api_class = type(api)
+    prefix = f"{api_class.__module__}.{api_class.__qualname__}-"
+    try:
+        path = os.path.join(cache_dir(), f"{prefix}{cache_key(api_class, js_path, version, lazy)}.json")
+    except OSError as e:
+        log.warning("Could not hash bindings sources: %s", e)
+        return cached_members(api, js_path, version, lazy, False)
+    try:
+        with open(path, 'r') as file:
+            members = _load(api, json.load(file))
+        log.debug("Using cached bindings %s", path)
+        return members
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    members = cached_members(api, js_path, version, lazy, False)
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith(prefix):
+                os.remove(os.path.join(directory, name))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(_dump(members))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("Could not cache bindings: %s", e)
+    return members
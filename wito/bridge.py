@@ -1,6 +1,23 @@
-import inspect
+import os
+import time
 import json
+import threading
+from collections import deque
 from gi.repository import GLib, Gio
+from wito.stats import BridgeStats
+from wito.store import Store
+from wito.serializer import BlobStore, Serializer, BLOB_ROUTE
+from wito.bindings import cached_members, introspect
+from wito.dispatch import Dispatcher
+from wito.events import EventPolicy
+from wito.streaming import ResultStream
+from wito.tasks import cancel_future
+from wito.log import get_logger, truncate
+from wito.utils import wito_base_path
+
+
+log = get_logger('bridge')
+CALL_KINDS = ('r', 'e', 'c', 'd')
 
 
 class PythonJavaScriptBridge:
@@ -10,47 +27,207 @@ class PythonJavaScriptBridge:
         self.win = window
         self.version = version
         self.exposed_methods = {}
-        self.pending_js = []
+        self.dispatchers = {}
+        self.routes = {BLOB_ROUTE: self.serve_blob}
+        self.blobs = BlobStore()
+        self.streams = {}
+        self.inflight = {}
+        wito_config = getattr(webview, 'wito_config', {})
+        self.serializer = Serializer.from_config(wito_config.get("serializer"), self.blobs)
+        self.stats = BridgeStats.from_config(wito_config.get("stats"))
+        self.store = Store(self)
+        self.subscriptions = set()
+        self.subscriptions_known = False
+        self.skipped_events = 0
+        self.event_policies = {
+            event: EventPolicy.from_config(options)
+            for event, options in (wito_config.get("events") or {}).items()}
+        self.pending_js = deque()
+        self.pending_js_stats = {"scripts": 0, "evaluations": 0, "wait_avg_ms": 0.0, "wait_max_ms": 0.0}
+        self.delivery_queue = []
+        self.delivery_lock = threading.Lock()
+        self.delivery_scheduled = False
+        self.delivery_stats = {"flushes": 0, "items": 0, "max_batch": 0, "last_batch": 0}
         self.register_exposed_methods()
         self.win.connect('realize', self.on_realize)
 
-    def register_exposed_methods(self):
-        for name, method in inspect.getmembers(self, inspect.ismethod):
-            if hasattr(method, '_exposed'):
-                if self.wito_dev_mode:
-                    print(f"Registering exposed method: {name}")
-                self.exposed_methods[name] = method
+    def register_exposed_methods(self, wito_config=None):
+        if wito_config is None:
+            wito_config = getattr(self.view, 'wito_config', {})
+        # The same scan is reused to generate the JavaScript bindings
+        if wito_config.get("generateBindings", True):
+            self.members = cached_members(
+                self, os.path.join(wito_base_path(), 'js'), wito_config.get("version"),
+                wito_config.get("lazyBindings", False), wito_config.get("bindingsCache", True))
+        else:
+            self.members = introspect(self)
+        for exposed in self.members.methods:
+            log.debug("Registering exposed method: %s", exposed.name)
+            self.exposed_methods[exposed.name] = exposed.method
+            # Cached scans carry no signature, the dispatcher reads it from the method
+            self.dispatchers[exposed.name] = Dispatcher(exposed.name, exposed.method, exposed.signature)
+        for route, method in self.members.routes.items():
+            log.debug("Registering route: %s -> %s", route, method.__name__)
+            self.routes[route] = method
 
     def eval_js(self, js, callback=None):
-        if self.wito_dev_mode:
-            print(f"Evaluating JS: {js}")
+        log.debug("Evaluating JS: %s", truncate(js))
         if self.view.is_loading():
-            self.pending_js.append((js, callback))
+            self.pending_js.append((js, callback, time.monotonic()))
         else:
             self.view.evaluate_javascript(js, -1, None, callback or None)
 
     def execute_pending_js(self):
+        """Evaluate the scripts queued while the page was loading.
+
+        Consecutive `wito._deliver` batches are merged into a single batch.
+        Every other script, such as extension code, is evaluated on its own
+        so its top level declarations stay global and a syntax error in it
+        cannot affect the others. Queue order is preserved.
+        """
+        if not self.pending_js:
+            return
+        now = time.monotonic()
+        scripts = len(self.pending_js)
+        waited = [now - enqueued for _, _, enqueued in self.pending_js]
+        deliveries = []
+        evaluations = 0
+
+        def flush_merged():
+            nonlocal evaluations
+            if deliveries:
+                self.view.evaluate_javascript(f"wito._deliver([{','.join(deliveries)}])", -1, None, None)
+                deliveries.clear()
+                evaluations += 1
+
         while self.pending_js:
-            if self.wito_dev_mode:
-                print("Executing pending JS")   
-            js, callback = self.pending_js.pop(0)
-            self.view.evaluate_javascript(js, -1, None, callback or None)
+            js, callback, _ = self.pending_js.popleft()
+            if isinstance(js, list):
+                # (kind, encoded item) pairs queued by flush_deliveries
+                deliveries.extend(item for _, item in js)
+            else:
+                flush_merged()
+                self.view.evaluate_javascript(js, -1, None, callback or None)
+                evaluations += 1
+        flush_merged()
+
+        stats = self.pending_js_stats
+        stats["scripts"] = scripts
+        stats["evaluations"] = evaluations
+        stats["wait_avg_ms"] = sum(waited) / scripts * 1000
+        stats["wait_max_ms"] = max(waited) * 1000
+        log.debug("Executed %d pending scripts in %d evaluations, waited %.1fms on average, %.1fms at most",
+                  scripts, evaluations, stats['wait_avg_ms'], stats['wait_max_ms'])
+
+    def deliver(self, kind, target, value):
+        """Queue a call result, call error or event for delivery to JavaScript.
+
+        Everything queued before the main loop gets idle is sent in a single
+        `wito._deliver([...])` evaluation. Safe to call from any thread.
+
+        Args:
+            kind (str): 'r' to resolve a call, 'e' to reject it, 'v' for an event,
+                'c' for a stream chunk, 'd' to end a stream and 's' for store operations.
+            target (int | str): The call id, or the event name for events.
+            value (Any): The result, error message, chunk or event data.
+        """
+        with self.delivery_lock:
+            self.delivery_queue.append((kind, target, value))
+            if self.delivery_scheduled:
+                return
+            self.delivery_scheduled = True
+        GLib.idle_add(self.flush_deliveries)
+
+    def flush_deliveries(self):
+        with self.delivery_lock:
+            items = self.delivery_queue
+            self.delivery_queue = []
+            self.delivery_scheduled = False
+        if not items:
+            return False
+
+        encoded = []
+        for kind, target, value in items:
+            method = self.stats.finish(target) if kind in ('r', 'e', 'd') else None
+            try:
+                started = time.perf_counter()
+                payload = self.serializer.dumps(value)
+                if method is not None:
+                    self.stats.record(method, "serialize_ms", (time.perf_counter() - started) * 1000)
+                    self.stats.record(method, "response_bytes", len(payload))
+                encoded.append((kind, f'["{kind}",{json.dumps(target)},{payload}]'))
+            except (TypeError, ValueError) as e:
+                log.error("Error serializing result: %s", e)
+                if kind != 'v':
+                    encoded.append(('e', f'["e",{json.dumps(target)},"Error serializing result"]'))
+        if self.view.is_loading():
+            # Kept as items so execute_pending_js can merge it with neighbouring batches
+            self.pending_js.append((encoded, None, time.monotonic()))
+        else:
+            self.eval_js(f"wito._deliver([{','.join(item for _, item in encoded)}])")
+
+        stats = self.delivery_stats
+        stats["flushes"] += 1
+        stats["items"] += len(items)
+        stats["last_batch"] = len(items)
+        stats["max_batch"] = max(stats["max_batch"], len(items))
+        log.debug("Delivered batch of %d items", len(items))
+        return False
+
+    def start_stream(self, call_id, iterator, window):
+        stream = ResultStream(self, call_id, iterator, window)
+        self.streams[call_id] = stream
+        stream.start()
+
+    def cancel_streams(self):
+        for stream in list(self.streams.values()):
+            stream.cancel()
+
+    def cancel_call(self, call_id):
+        """Cancel an in-flight threaded call, its result is never delivered."""
+        entry = self.inflight.get(call_id)
+        self.stats.finish(call_id)
+        if entry is not None:
+            future, settle = entry
+            settle(False, "Operation cancelled", cancelled=True)
+            cancel_future(future)
+
+    def cancel_calls(self):
+        for call_id in list(self.inflight):
+            self.cancel_call(call_id)
+
+    def drop_call_deliveries(self):
+        """Drop queued results and stream items, their call ids may be reused by the next page."""
+        with self.delivery_lock:
+            dropped = [item for item in self.delivery_queue if item[0] in CALL_KINDS]
+            self.delivery_queue = [item for item in self.delivery_queue if item[0] not in CALL_KINDS]
+        for _, target, _ in dropped:
+            self.stats.finish(target)
+        for index, (js, callback, enqueued) in enumerate(self.pending_js):
+            if isinstance(js, list):
+                self.pending_js[index] = ([item for item in js if item[0] not in CALL_KINDS], callback, enqueued)
+
+    def serve_blob(self, token, params):
+        data = self.blobs.pop(token)
+        if data is None:
+            return None
+        return data, 'application/octet-stream'
 
     def emit_event(self, event, data):
         """
         Emits an event to the JavaScript layer with associated data.
 
-        This method bridges Python and JavaScript by triggering events in the JavaScript
-        environment. It serializes the Python data to JSON and calls the JavaScript
-        _emitEvent method.
+        Events are queued with call results and delivered in one batch per main
+        loop iteration, see `deliver`. Events whose data cannot be serialized are
+        dropped with an error message. Events with an emission policy, set under
+        `events` in wito-config.json or with `set_event_policy`, are throttled,
+        coalesced or batched first. Once the page has loaded, events it has no
+        `wito.on` listener for are dropped before they are serialized. Safe to
+        call from any thread.
 
         Args:
             event (str): The name of the event to emit.
-            data (Any): The data to pass with the event. Must be JSON-serializable.
-
-        Raises:
-            TypeError: If data cannot be serialized to JSON.
-            ValueError: If event name contains invalid characters.
+            data (Any): The data to pass with the event, encoded with the bridge serializer.
 
         Example:
             ```python
@@ -69,17 +246,70 @@ class PythonJavaScriptBridge:
             ```
 
         Note:
-            - The data must be JSON-serializable
+            - The data must be encodable by the bridge serializer
             - Event names should follow JavaScript naming conventions
-            - The JavaScript layer must have the _emitEvent method defined
+            - Listeners are registered in JavaScript with `wito.on(event, callback)`
             - Large data structures may impact performance
 
         See Also:
-            - eval_js: Method used to execute JavaScript code
-            - json.dumps: JSON serialization method
+            - deliver: Queues the event for the next batch sent to JavaScript
+            - has_listeners: Checks whether the page listens to an event
+            - set_event_policy: Throttles, coalesces or batches an event
         """
-        js = f"wito._emitEvent('{event}', {json.dumps(data)})"
-        self.eval_js(js)
+        if not self.has_listeners(event):
+            self.skipped_events += 1
+            log.debug("Skipping event '%s', the page does not listen to it", event)
+            return
+        policy = self.event_policies.get(event)
+        if policy is None:
+            self.deliver('v', event, data)
+            return
+        delay = policy.offer(data)
+        if delay is None:
+            return
+        if delay:
+            GLib.timeout_add(int(delay * 1000), self.release_event, event, policy)
+        else:
+            GLib.idle_add(self.release_event, event, policy)
+
+    def has_listeners(self, event):
+        """Check whether the page listens to `event` before computing an expensive payload.
+
+        Always True while the page is loading, listeners registered during
+        load are only known once it has finished.
+
+        Example:
+            ```python
+            if self.has_listeners('stats_updated'):
+                self.emit_event('stats_updated', collect_stats())
+            ```
+        """
+        return not self.subscriptions_known or event in self.subscriptions
+
+    def release_event(self, event, policy):
+        self.deliver('v', event, policy.take())
+        if policy.dropped or policy.merged:
+            log.debug("Event '%s': %d sent, %d dropped, %d merged", event, policy.sent, policy.dropped, policy.merged)
+        return False
+
+    def set_event_policy(self, event, mode=None, hz=None):
+        """Throttle, coalesce or batch an event, or pass None to emit it directly again.
+
+        Args:
+            event (str): The event name.
+            mode (str, optional): 'throttle', 'latest' or 'batch', see `EventPolicy`.
+            hz (float, optional): Maximum deliveries per second, required for 'throttle'.
+
+        Example:
+            ```python
+            self.set_event_policy('progress', 'throttle', hz=30)
+            self.set_event_policy('log_line', 'batch', hz=10)
+            ```
+        """
+        if mode is None:
+            self.event_policies.pop(event, None)
+        else:
+            self.event_policies[event] = EventPolicy(mode, hz)
 
     def on_realize(self, widget):
         self.settings = Gio.Settings.new("org.gnome.desktop.interface")
@@ -91,11 +321,10 @@ class PythonJavaScriptBridge:
         try:
             color_scheme = self.settings.get_string("color-scheme")
             is_dark = color_scheme == "prefer-dark"
-            if self.wito_dev_mode:
-                print(f"Color scheme: {color_scheme}", f"isDark:{is_dark}")
+            log.debug("Color scheme: %s isDark:%s", color_scheme, is_dark)
             return is_dark
         except Exception as e:
-            print(f"Error checking theme: {e}")
+            log.error("Error checking theme: %s", e)
 
     def set_initial_theme(self):
         is_dark = self.check_theme()
@@ -122,8 +351,7 @@ class PythonJavaScriptBridge:
             - This event automatically gets subscribed to when the bridge is instantiated.
             - The event automatically adds light-theme or dark-theme classes to document body.
         """
-        js = "wito._emitEvent('isDarkTheme', {})"
-        self.eval_js(js)
+        self.emit_event('isDarkTheme', {})
 
 
     def set_body_theme_class(self, is_dark):
@@ -151,5 +379,4 @@ class PythonJavaScriptBridge:
                 console.log('Screen configuration changed');
             });
         """
-        js = "wito._emitEvent('screenChange', {})"
-        self.eval_js(js)
\ No newline at end of file
+        self.emit_event('screenChange', {})
\ No newline at end of file
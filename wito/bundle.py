@@ -0,0 +1,164 @@
+"""Packed production asset bundles.
+
+A bundle is a single file holding every asset of an application directory,
+served over wito:// from a memory map instead of the filesystem.
+
+Layout:
+    - 8 bytes magic `WITOPAK1`
+    - 8 bytes little-endian length of the JSON index
+    - JSON index mapping relative paths to `[offset, length, content_type, etag]`
+    - file contents, offsets are relative to the end of the index
+
+Build one with:
+    ```
+    python -m wito.bundle path/to/app path/to/app/app.witopak
+    ```
+"""
+import os
+import sys
+import json
+import mmap
+import shutil
+import struct
+import hashlib
+import argparse
+from fnmatch import fnmatch
+from gi.repository import Gio
+
+
+MAGIC = b'WITOPAK1'
+HEADER = struct.Struct('<8sQ')
+DEFAULT_EXCLUDES = ('*.py', '*.pyc', '__pycache__', '.*', '*.witopak', 'wito-config.json')
+
+
+class AssetBundle:
+    """Read-only view of a bundle file backed by an mmap.
+
+    Example:
+        ```python
+        bundle = AssetBundle('app.witopak')
+        entry = bundle.get('index.html')
+        if entry:
+            content_type, data, etag = entry
+        ```
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a wito bundle")
+        index_end = HEADER.size + index_length
+        self.index = json.loads(self._map[HEADER.size:index_end])
+        self.data_offset = index_end
+        self.mtime = os.stat(path).st_mtime
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, path):
+        """Return `(content_type, data, etag)` for a relative path, None if missing."""
+        entry = self.index.get(path)
+        if entry is None:
+            return None
+        offset, length, content_type, etag = entry
+        start = self.data_offset + offset
+        return content_type, memoryview(self._map)[start:start + length], etag
+
+    def close(self):
+        self._map.close()
+
+
+class EntryReader:
+    """Sequential reader over a mapped bundle entry, copying one chunk per read."""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.data) if size is None or size < 0 else self.position + size
+        chunk = bytes(self.data[self.position:end])
+        self.position += len(chunk)
+        return chunk
+
+    def close(self):
+        self.data.release()
+
+
+def _excluded(rel_path, excludes):
+    return any(fnmatch(part, pattern) for part in rel_path.split(os.sep) for pattern in excludes)
+
+
+def _sha1(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_bundle(app_dir, output, excludes=DEFAULT_EXCLUDES):
+    """Pack every file of `app_dir` into a bundle written to `output`.
+
+    Files are hashed and copied in chunks, so packing large media does not
+    need more memory than a single chunk. Returns the number of packed files.
+    """
+    app_dir = os.path.abspath(app_dir)
+    output = os.path.abspath(output)
+    index = {}
+    sources = []
+    offset = 0
+
+    for root, dirs, files in os.walk(app_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            file_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(file_path, app_dir)
+            if file_path == output or _excluded(rel_path, excludes):
+                continue
+            size = os.stat(file_path).st_size
+            content_type, _ = Gio.content_type_guess(file_path, None)
+            index[rel_path.replace(os.sep, '/')] = [offset, size, content_type, _sha1(file_path)]
+            sources.append((file_path, size))
+            offset += size
+
+    index_bytes = json.dumps(index, separators=(',', ':')).encode()
+    tmp_output = output + '.tmp'
+    try:
+        with open(tmp_output, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            for file_path, size in sources:
+                start = f.tell()
+                with open(file_path, 'rb') as source:
+                    shutil.copyfileobj(source, f)
+                if f.tell() - start != size:
+                    raise OSError(f"'{file_path}' changed while the bundle was built")
+        os.replace(tmp_output, output)
+    except BaseException:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        raise
+    return len(index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack a wito application directory into a single bundle file.")
+    parser.add_argument('app_dir', help="application directory containing index.html")
+    parser.add_argument('output', help="bundle file to write, e.g. app.witopak")
+    parser.add_argument('--exclude', action='append', default=[],
+                        help="extra glob pattern to leave out, may be repeated")
+    args = parser.parse_args(argv)
+    count = build_bundle(args.app_dir, args.output, DEFAULT_EXCLUDES + tuple(args.exclude))
+    print(f"Packed {count} files into {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
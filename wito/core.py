@@ -1,55 +1,290 @@
 import os
 import gi
 import json
+import time
 import inspect
-from concurrent.futures import Future
+import logging
+import threading
+from functools import partial
+from stat import S_ISREG
+from urllib.parse import parse_qsl
+from concurrent.futures import Future, CancelledError
 gi.require_version('Gtk', '4.0')
 gi.require_version('WebKit', '6.0')
-from gi.repository import WebKit, Gio, GLib
+gi.require_version('Soup', '3.0')
+gi.require_version('JavaScriptCore', '6.0')
+from gi.repository import WebKit, Gio, GLib, Soup, JavaScriptCore
+try:
+    gi.require_version('GioUnix', '2.0')
+    from gi.repository import GioUnix
+    UnixInputStream = GioUnix.InputStream
+except (ValueError, ImportError):
+    UnixInputStream = Gio.UnixInputStream
 from wito.interface import API
 from wito.utils import app_base_path, wito_base_path
+from wito.assets import (
+    AssetCache, AssetResponse, CachePolicy, CONDITIONAL_HEADERS, DEFAULT_MAX_ENTRY_BYTES,
+    RANGE_NOT_SATISFIABLE, is_not_modified, parse_range, validators)
+from wito.bundle import AssetBundle, EntryReader
+from wito.streaming import STREAMING, DEFAULT_WINDOW, collect, is_stream
+from wito.tasks import cancel_future, configure_pools, get_pool
+from wito import aio, processes
 from wito.extensions.ext_loader import extension_manager
+from wito.log import configure_logging, get_logger, truncate
+
+
+log = get_logger('bridge')
+protocol_log = get_logger('protocol')
+CONTROL_KEYS = ('ack', 'cancel', 'store', 'subscribe', 'unsubscribe')
 
 
 class WitoProtocolHandler:
-    def __init__(self):
-        pass
+    def __init__(self, wito_config=None):
+        wito_config = wito_config or {}
+        self.cache = AssetCache.from_config(wito_config.get("assetCache", True))
+        self.max_entry_bytes = self.cache.max_entry_bytes if self.cache else DEFAULT_MAX_ENTRY_BYTES
+        self.async_mode = wito_config.get("asyncFileServing", False)
+        self.bundle = self.open_bundle(wito_config.get("bundle"))
+        self.cache_policy = CachePolicy(wito_config.get("cacheControl"))
+        self.routes = []
+
+    def set_routes(self, routes):
+        # Longest prefix first so nested routes win over their parents
+        self.routes = sorted(routes.items(), key=lambda route: len(route[0]), reverse=True)
+
+    def open_bundle(self, bundle_path):
+        if not bundle_path:
+            return None
+        bundle_path = os.path.join(app_base_path(), bundle_path)
+        try:
+            return AssetBundle(bundle_path)
+        except (OSError, ValueError) as e:
+            protocol_log.error("Error opening asset bundle %s: %s", bundle_path, e)
+            return None
 
     def handle_request(self, request):
         uri = request.get_uri()
         scheme, path = uri.split('://', 1)        
-        path = path.split('?')[0]   
+        path, _, query = path.partition('?')
         if path.startswith('index.html/'):
             path = path.replace('index.html/', '', 1)   
-        file_path = os.path.join(app_base_path(), path)
-        
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            content_type, _ = Gio.content_type_guess(file_path, None) 
-            with open(file_path, 'rb') as f:
-                contents = f.read()
-            
-            stream = Gio.MemoryInputStream.new_from_data(contents, None)
-            request.finish(stream, len(contents), content_type)
+
+        for prefix, handler in self.routes:
+            if path.startswith(prefix):
+                self.serve_route(request, handler, path[len(prefix):], dict(parse_qsl(query)))
+                return True
+
+        file_path = os.path.normpath(os.path.join(app_base_path(), path))
+        request_headers = self.read_request_headers(request)
+
+        if self.async_mode:
+            # Disk I/O runs on the default pool, the response is finished on the main loop
+            future = get_pool('default').submit(partial(self.load, path, file_path, request_headers))
+            future.add_done_callback(
+                lambda future: GLib.idle_add(self.respond, request, self.future_response(future)))
         else:
-            error = GLib.Error.new_literal(
-                Gio.io_error_quark(), 
-                "File not found",
-                4)
-            
-            request.finish_error(error)
-            print(file_path, str(error))        
+            self.respond(request, self.load(path, file_path, request_headers))
         return True
 
+    def read_request_headers(self, request):
+        headers = request.get_http_headers()
+        if not headers:
+            return {}
+        return {name: value for name in CONDITIONAL_HEADERS if (value := headers.get_one(name))}
+
+    def load(self, path, file_path, request_headers):
+        if self.bundle:
+            entry = self.bundle.get(path or 'index.html')
+            if entry:
+                content_type, contents, etag = entry
+                return self.load_bundled(path, content_type, contents, etag, request_headers)
+        return self.load_file(path, file_path, request_headers)
+
+    def load_bundled(self, path, content_type, contents, etag, request_headers):
+        headers = validators(etag, self.bundle.mtime, self.cache_policy.cache_control(path))
+        if is_not_modified(request_headers, etag, self.bundle.mtime):
+            return AssetResponse(304, headers=headers)
+
+        size = len(contents)
+        byte_range = parse_range(request_headers.get('Range'), size)
+        headers.append(('Accept-Ranges', 'bytes'))
+
+        if byte_range is RANGE_NOT_SATISFIABLE:
+            headers.append(('Content-Range', f"bytes */{size}"))
+            return AssetResponse(416, headers=headers)
+        if byte_range:
+            start, end = byte_range
+            headers.append(('Content-Range', f"bytes {start}-{end}/{size}"))
+            return AssetResponse(206, content_type, bytes(contents[start:end + 1]), headers=headers)
+        if size > self.max_entry_bytes:
+            # Large entries are pumped from the map in chunks instead of copied whole
+            return AssetResponse(
+                200, content_type, self.stream_file_object(EntryReader(contents)), size, headers)
+        return AssetResponse(200, content_type, bytes(contents), headers=headers)
+
+    def future_response(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            return AssetResponse(500, error=str(e))
+
+    def load_file(self, path, file_path, request_headers):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+
+        if stat is None or not S_ISREG(stat.st_mode):
+            protocol_log.info("File not found: %s", file_path)
+            return AssetResponse(404, error="File not found")
+
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        headers = validators(etag, stat.st_mtime, self.cache_policy.cache_control(path))
+        if is_not_modified(request_headers, etag, stat.st_mtime):
+            return AssetResponse(304, headers=headers)
+
+        byte_range = parse_range(request_headers.get('Range'), stat.st_size)
+        headers.append(('Accept-Ranges', 'bytes'))
+
+        if byte_range is RANGE_NOT_SATISFIABLE:
+            headers.append(('Content-Range', f"bytes */{stat.st_size}"))
+            return AssetResponse(416, headers=headers)
+
+        # Files over the entry limit are never cached, looking them up would only count misses
+        cacheable = self.cache and stat.st_size <= self.cache.max_entry_bytes
+        cached = self.cache.get(file_path, stat) if cacheable else None
+        if cached:
+            content_type, contents = cached.content_type, cached.data
+        else:
+            content_type, _ = Gio.content_type_guess(file_path, None)
+            contents = None
+            if cacheable:
+                with open(file_path, 'rb') as f:
+                    contents = f.read()
+                self.cache.put(file_path, stat, content_type, contents)
+
+        if byte_range:
+            start, end = byte_range
+            if contents is not None:
+                chunk = contents[start:end + 1]
+            else:
+                with open(file_path, 'rb') as f:
+                    chunk = os.pread(f.fileno(), end - start + 1, start)
+            headers.append(('Content-Range', f"bytes {start}-{end}/{stat.st_size}"))
+            return AssetResponse(206, content_type, chunk, headers=headers)
+        elif contents is not None:
+            return AssetResponse(200, content_type, contents, headers=headers)
+        else:
+            # Large files are streamed from disk instead of being read into memory
+            stream = Gio.File.new_for_path(file_path).read(None)
+            return AssetResponse(200, content_type, stream, stat.st_size, headers)
+
+    def serve_route(self, request, handler, path, params):
+        try:
+            result = handler(path, params)
+        except Exception as e:
+            protocol_log.error("Error in route handler %s: %s", handler.__name__, e)
+            self.respond(request, AssetResponse(500, error=str(e)))
+            return
+
+        if isinstance(result, Future):
+            result.add_done_callback(
+                lambda future: GLib.idle_add(self.respond, request, self.route_response(self.future_response(future))))
+        else:
+            self.respond(request, self.route_response(result))
+
+    def route_response(self, result):
+        if isinstance(result, AssetResponse):
+            return result
+        content_type = None
+        if isinstance(result, tuple):
+            result, content_type = result
+
+        if result is None:
+            return AssetResponse(404, error="File not found")
+        elif isinstance(result, (bytes, bytearray, memoryview)):
+            body = bytes(result)
+            content_type = content_type or 'application/octet-stream'
+        elif isinstance(result, str):
+            body = result.encode()
+            content_type = content_type or 'text/plain; charset=utf-8'
+        elif isinstance(result, (dict, list)):
+            body = json.dumps(result).encode()
+            content_type = content_type or 'application/json'
+        elif hasattr(result, 'read'):
+            return AssetResponse(200, content_type or 'application/octet-stream', self.stream_file_object(result))
+        else:
+            return AssetResponse(500, error=f"Unsupported route result: {type(result).__name__}")
+        return AssetResponse(200, content_type, body, headers=[('Cache-Control', 'no-store')])
+
+    def stream_file_object(self, file_object, chunk_size=64 * 1024):
+        # Pump the file object through a pipe so the page reads it as it is produced,
+        # pipe backpressure keeps only a few chunks in memory at a time
+        read_fd, write_fd = os.pipe()
+
+        def pump():
+            # The pipe is opened first so the page always reaches EOF, whatever the file object does
+            try:
+                with open(write_fd, 'wb') as pipe:
+                    while chunk := file_object.read(chunk_size):
+                        pipe.write(chunk)
+            except BrokenPipeError:
+                # The page stopped reading, e.g. a cancelled download
+                pass
+            except Exception as e:
+                protocol_log.error("Error streaming route response: %s", e)
+            finally:
+                close = getattr(file_object, 'close', None)
+                if close:
+                    close()
+
+        threading.Thread(target=pump, name="wito-route-stream", daemon=True).start()
+        return UnixInputStream.new(read_fd, True)
+
+    def respond(self, request, response):
+        if response.error:
+            code = Gio.IOErrorEnum.NOT_FOUND if response.status == 404 else Gio.IOErrorEnum.FAILED
+            error = GLib.Error.new_literal(Gio.io_error_quark(), response.error, int(code))
+            request.finish_error(error)
+            return False
+
+        if isinstance(response.body, Gio.InputStream):
+            stream = response.body
+            length = response.length if response.length is not None else -1
+        else:
+            stream = Gio.MemoryInputStream.new_from_bytes(GLib.Bytes.new(response.body))
+            length = len(response.body)
+        headers = Soup.MessageHeaders.new(Soup.MessageHeadersType.RESPONSE)
+        for name, value in response.headers:
+            headers.append(name, value)
+
+        scheme_response = WebKit.URISchemeResponse.new(stream, length)
+        scheme_response.set_status(response.status, None)
+        if response.content_type:
+            scheme_response.set_content_type(response.content_type)
+        scheme_response.set_http_headers(headers)
+        request.finish_with_response(scheme_response)
+        return False
+
+    def invalidate(self, path=None):
+        if self.cache:
+            self.cache.invalidate(path)
+
 
 class WebView(WebKit.WebView):
     def __init__(self, window, extended_api, wito_config):
         self.content_manager = WebKit.UserContentManager()
         super().__init__(user_content_manager=self.content_manager)
+        self.wito_config = wito_config
+        configure_logging(wito_config)
         self.app_base_path = app_base_path()
         self.wito_base_path = wito_base_path()
         self.dev_mode = wito_config.get("devMode")
         self.wito_dev_mode = wito_config.get("witoDevMode")
         self.generate_bindings = wito_config.get("generateBindings", True)
+        self.batch_calls = wito_config.get("batchCalls", False)
+        self.transport = wito_config.get("transport", "eval")
+        self.stream_window = wito_config.get("streamWindow", DEFAULT_WINDOW)
         context = self.get_context()
         settings = self.get_settings()
 
@@ -57,17 +292,28 @@ class WebView(WebKit.WebView):
             settings.set_property("enable-developer-extras", self.dev_mode)
             settings.set_property("enable-write-console-messages-to-stdout", True)
         
-        protocol_handler = WitoProtocolHandler()        
-        context.register_uri_scheme("wito", protocol_handler.handle_request)
+        configure_pools(wito_config.get("pools"))
+        processes.configure(wito_config.get("processWorkers"))
+        if processes.declared:
+            processes.warm_up()
+        self.protocol_handler = WitoProtocolHandler(wito_config)
+        context.register_uri_scheme("wito", self.protocol_handler.handle_request)
+        context.get_security_manager().register_uri_scheme_as_cors_enabled("wito")
         if extended_api:
             self.api = extended_api(self, window, wito_config.get("version"), wito_config.get("witoDevMode"))
         else:
             self.api = API(self, window, wito_config.get("version"), wito_config.get("witoDevMode"))
 
+        self.protocol_handler.set_routes(self.api.routes)
+
         self.connect("decide-policy", self.on_decide_policy)
         self.connect("load-changed", self.on_load_changed)
         self.get_user_content_manager().register_script_message_handler("Invoke")
         self.get_user_content_manager().connect("script-message-received::Invoke", self.on_invoke)
+        if self.transport == "reply":
+            self.get_user_content_manager().register_script_message_handler_with_reply("InvokeReply", None)
+            self.get_user_content_manager().connect(
+                "script-message-with-reply-received::InvokeReply", self.on_invoke_reply)
         
         settings.set_enable_javascript(True)
         settings.set_hardware_acceleration_policy(WebKit.HardwareAccelerationPolicy.ALWAYS)
@@ -93,7 +339,7 @@ class WebView(WebKit.WebView):
                 return True
 
             except GLib.Error as e:
-                print(f"Error opening external application: {e}")
+                log.error("Error opening external application: %s", e)
                 decision.ignore()
                 return True
 
@@ -112,8 +358,21 @@ class WebView(WebKit.WebView):
             )
 
     def on_load_changed(self, web_view, load_event):
-        if load_event == WebKit.LoadEvent.FINISHED:
+        if load_event == WebKit.LoadEvent.STARTED:
+            # Blobs and streams of the previous page will never be consumed
+            self.api.blobs.clear()
+            self.api.cancel_streams()
+            self.api.cancel_calls()
+            self.api.drop_call_deliveries()
+            # The new page reports its own event listeners
+            self.api.subscriptions.clear()
+            self.api.subscriptions_known = False
+        elif load_event == WebKit.LoadEvent.FINISHED:
             self.api.execute_pending_js()
+            self.api.subscriptions_known = True
+            # An empty store already matches the page's initial state
+            if self.api.store:
+                self.api.store.sync()
             if self.dev_mode:
                 from wito.file_watcher import setup_file_watcher
                 inspector = self.get_inspector()
@@ -123,55 +382,30 @@ class WebView(WebKit.WebView):
                         1,
                         setup_file_watcher,
                         self.app_base_path,
-                        self.reload,
+                        self.on_app_files_changed,
                         ('.html', '.js', '.css'))
 
+    def on_app_files_changed(self):
+        self.protocol_handler.invalidate()
+        self.reload()
+
     def inject_bindings(self):
         try:
-            with open(f"{self.wito_base_path}/js/interface.js", 'r') as file:
-                interface_js = file.read()
-
+            js_path = f"{self.wito_base_path}/js"
             if self.generate_bindings:
-                with open(f"{self.wito_base_path}/js/method_template.js", 'r') as file:
-                    method_template = file.read()
-                    
-                with open(f"{self.wito_base_path}/js/property_template.js", 'r') as file:
-                    property_template = file.read()
-
-                # Generate method bindings
-                method_bindings = []
-                for method_name, method in inspect.getmembers(self.api, inspect.ismethod):
-                    if hasattr(method, '_exposed'):
-                        try:
-                            params = inspect.signature(method).parameters
-                            params_list = ', '.join(params.keys())
-                            args_object = ', '.join(f"{name}: {name}" for name in params.keys())
-                            
-                            binding = method_template\
-                                .replace('METHOD_NAME', method_name)\
-                                .replace('PARAMS', params_list)\
-                                .replace('ARGS_OBJECT', args_object)
-                            method_bindings.append(binding)
-                        except ValueError as e:
-                            print(f"Error processing method {method_name}: {e}")
-                            # Skip this method if we can't process its signature
-
-                # Generate property bindings
-                property_bindings = []
-                for prop_name, prop in inspect.getmembers(self.api.__class__, lambda o: isinstance(o, property)):
-                    if hasattr(prop.fget, '_exposed'):
-                        binding = property_template.replace('PROP_NAME', prop_name)
-                        property_bindings.append(binding)
-
-                js_bindings = interface_js\
-                    .replace('// METHOD_BINDINGS_PLACEHOLDER', '\n'.join(method_bindings))\
-                    .replace('// PROPERTY_BINDINGS_PLACEHOLDER', '\n'.join(property_bindings))\
-                    .replace('// WITO_DEV_MODE_PLACEHOLDER', str(self.wito_dev_mode).lower())\
-                    .replace('// APP_DEV_MODE_PLACEHOLDER', str(self.dev_mode).lower())
+                # Built, or loaded from the cache, with the API scan
+                interface_js = self.api.members.script
             else:
-                js_bindings = interface_js\
-                    .replace('// WITO_DEV_MODE_PLACEHOLDER', str(self.wito_dev_mode).lower())\
-                    .replace('// APP_DEV_MODE_PLACEHOLDER', str(self.dev_mode).lower())
+                with open(f"{js_path}/interface.js", 'r') as file:
+                    interface_js = file.read()
+
+            js_bindings = interface_js\
+                .replace('// WITO_DEV_MODE_PLACEHOLDER', str(self.wito_dev_mode).lower())\
+                .replace('// APP_DEV_MODE_PLACEHOLDER', str(self.dev_mode).lower())\
+                .replace('// BATCH_CALLS_PLACEHOLDER', str(self.batch_calls).lower())\
+                .replace('// TRANSPORT_PLACEHOLDER', json.dumps(self.transport))\
+                .replace('// STREAM_WINDOW_PLACEHOLDER', str(self.stream_window))\
+                .replace('// LAZY_METHODS_PLACEHOLDER', 'null')
 
             # Create and add the user script
             user_script = WebKit.UserScript.new(
@@ -183,62 +417,236 @@ class WebView(WebKit.WebView):
             )
             self.get_user_content_manager().add_script(user_script)
         except Exception as e:
-            print(f"Error injecting wito.js and bindings: {e}")
-            # Print the full traceback for debugging
-            import traceback
-            traceback.print_exc()
+            log.exception("Error injecting wito.js and bindings: %s", e)
 
     def on_invoke(self, user_content_manager, js_result):
-        call_id = None
         try:
             message = js_result.to_string()
-            if self.wito_dev_mode:
-                print(f"Received message: {message}")
-            data = json.loads(message)
+            log.debug("Received message: %s", truncate(message))
+            data = self.api.serializer.loads(message)
+        except Exception as e:
+            log.error("Error in on_invoke: %s", e)
+            return
+
+        if not data.keys().isdisjoint(CONTROL_KEYS):
+            self.on_control(data)
+            return
+
+        # Replies are queued and delivered to the page in one evaluation per main loop iteration
+        calls = data['batch'] if 'batch' in data else (data,)
+        request_bytes = len(message) // max(len(calls), 1)
+        for call in calls:
+            call_id, ok, value = self.dispatch(call, request_bytes)
+            if call_id is None or value is STREAMING:
+                continue
+            if not ok:
+                self.send_error(call_id, value)
+            elif isinstance(value, Future):
+                self.handle_future(call_id, value)
+            else:
+                self.send_response(call_id, value)
+
+    def on_control(self, data):
+        """Handle flow control messages that expect no reply."""
+        if 'ack' in data:
+            stream = self.api.streams.get(data['ack'])
+            if stream:
+                stream.ack(data.get('n', 1))
+        elif 'cancel' in data:
+            stream = self.api.streams.get(data['cancel'])
+            if stream:
+                stream.cancel()
+            else:
+                self.api.cancel_call(data['cancel'])
+        elif 'subscribe' in data:
+            self.api.subscriptions.add(data['subscribe'])
+        elif 'unsubscribe' in data:
+            self.api.subscriptions.discard(data['unsubscribe'])
+        elif 'store' in data:
+            try:
+                self.api.store.apply(data['store'])
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                log.error("Error applying store update: %s", e)
+
+    def on_invoke_reply(self, user_content_manager, js_value, reply):
+        """Handle an Invoke message sent with the reply transport.
+
+        Results are handed back through the message's own reply as a
+        JavaScriptCore value built from JSON, instead of evaluating generated
+        source. A batch is answered once, with `[ok, value]` pairs in call
+        order, after every call in it has finished.
+        """
+        context = js_value.get_context()
+        try:
+            message = js_value.to_string()
+            log.debug("Received message: %s", truncate(message))
+            data = self.api.serializer.loads(message)
+        except Exception as e:
+            log.error("Error in on_invoke: %s", e)
+            reply.return_error_message(str(e))
+            return True
+
+        if 'batch' not in data:
+            def finish_single(ok, value):
+                if ok:
+                    self.reply_value(reply, context, value, data.get('method'))
+                else:
+                    reply.return_error_message(value)
+            call_id, ok, value = self.dispatch(data, len(message))
+            self.when_settled(call_id, ok, value, finish_single,
+                              on_cancel=lambda: finish_single(False, "Operation cancelled"))
+            return True
+
+        calls = data['batch']
+        results = [None] * len(calls)
+        remaining = [len(calls)]
+
+        def settle(index, ok, value):
+            results[index] = [ok, value]
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self.reply_value(reply, context, results)
+
+        if not calls:
+            self.reply_value(reply, context, results)
+        request_bytes = len(message) // max(len(calls), 1)
+        for index, call in enumerate(calls):
+            call_id, ok, value = self.dispatch(call, request_bytes)
+            # Cancelled calls are settled too, or the rest of the batch would never be answered
+            self.when_settled(call_id, ok, value, lambda ok, value, index=index: settle(index, ok, value),
+                              on_cancel=lambda index=index: settle(index, False, "Operation cancelled"))
+        return True
+
+    def when_settled(self, call_id, ok, value, callback, on_cancel=None):
+        """Call `callback(ok, value)` on the main loop once a dispatch result is final.
+
+        Futures are tracked as in-flight calls until they finish, time out or
+        are cancelled by the page; whichever happens first settles the call and
+        the others are ignored. Cancelled calls are only answered through
+        `on_cancel`, the page already rejected them.
+        """
+        if value is STREAMING:
+            # Chunks are delivered separately, the reply only confirms the start
+            callback(True, None)
+            return
+        if not (ok and isinstance(value, Future)):
+            callback(ok, value)
+            return
+
+        future = value
+        # Calls without an id still need their own key to be cancelled on navigation
+        key = call_id if call_id is not None else object()
+        timer = None
+
+        def settle(ok, value, cancelled=False):
+            # Page call ids restart after navigation, only the entry registered here settles this call
+            if self.api.inflight.get(key) is not entry:
+                return False
+            del self.api.inflight[key]
+            if timer is not None:
+                GLib.source_remove(timer)
+            if not cancelled:
+                callback(ok, value)
+            elif on_cancel is not None:
+                on_cancel()
+            return False
+
+        def on_timeout():
+            nonlocal timer
+            timer = None
+            if self.api.inflight.get(key) is entry:
+                settle(False, "Operation timed out")
+                cancel_future(future)
+            return False
+
+        def on_future_done(future):
+            try:
+                result = (True, future.result())
+            except CancelledError:
+                result = (False, "Operation cancelled")
+            except Exception as e:
+                result = (False, str(e))
+            GLib.idle_add(settle, *result)
+
+        entry = (future, settle)
+        self.api.inflight[key] = entry
+        timeout = getattr(future, 'wito_timeout', None)
+        if timeout:
+            timer = GLib.timeout_add(int(timeout * 1000), on_timeout)
+        future.add_done_callback(on_future_done)
+
+    def reply_value(self, reply, context, value, method=None):
+        try:
+            started = time.perf_counter()
+            payload = self.api.serializer.dumps(value)
+            if method is not None:
+                self.api.stats.record(method, "serialize_ms", (time.perf_counter() - started) * 1000)
+                self.api.stats.record(method, "response_bytes", len(payload))
+            reply.return_value(JavaScriptCore.Value.new_from_json(context, payload))
+        except (TypeError, ValueError) as e:
+            log.error("Error serializing result: %s", e)
+            reply.return_error_message("Error serializing result")
+
+    def dispatch(self, data, request_bytes=None):
+        """Call an exposed method for one Invoke message.
+
+        Returns a `(call_id, ok, value)` tuple. `value` is the result, a Future
+        for threaded methods, or the error message when `ok` is False.
+        """
+        call_id = None
+        try:
             method_name = data.get('method')
-            args = data.get('args', {})
+            args = data.get('args')
             call_id = data.get('id')
 
-            if method_name in self.api.exposed_methods:
-                method = self.api.exposed_methods[method_name]
-                result = method(**args)
-                if self.wito_dev_mode:
-                    print(f"Calling method: {method_name}")
-                    print(f"Method result: {result}")
+            dispatcher = self.api.dispatchers.get(method_name)
+            if dispatcher is not None:
+                # Reply transport results are not matched by call id, they are recorded in reply_value
+                self.api.stats.call(method_name, call_id if self.transport == "eval" else None, request_bytes)
+                started = time.perf_counter()
+                # Arguments are validated here, before a @thread method reaches its pool
+                try:
+                    result = dispatcher(args)
+                except Exception:
+                    self.api.stats.error(method_name)
+                    raise
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Calling method: %s", method_name)
+                    log.debug("Method result: %s", truncate(result))
+
+                if inspect.iscoroutine(result):
+                    # Coroutines run on the shared asyncio loop and settle like any Future
+                    result = aio.submit(result)
+                elif is_stream(result):
+                    if data.get('stream'):
+                        self.api.start_stream(call_id, result, self.stream_window)
+                        return call_id, True, STREAMING
+                    # Plain _invoke calls of generator methods get every chunk at once
+                    result = get_pool('default').submit(partial(collect, result))
 
                 if isinstance(result, Future):
-                    self.handle_future(call_id, result)
+                    self.api.stats.record_future(method_name, result, started)
                 else:
-                    self.send_response(call_id, result)
+                    self.api.stats.record(method_name, "exec_ms", (time.perf_counter() - started) * 1000)
+                return call_id, True, result
             else:
-                print(f"Method not found: {method_name}")
-                self.send_error(call_id, f"Method '{method_name}' not found")
+                log.warning("Method not found: %s", method_name)
+                return call_id, False, f"Method '{method_name}' not found"
         except Exception as e:
-            print(f"Error in on_invoke: {e}")
-            if call_id is not None:
-                self.send_error(call_id, str(e))
+            log.error("Error in on_invoke: %s", e)
+            return call_id, False, str(e)
 
     def handle_future(self, call_id, future):
-        def on_future_done(future):
-            try:
-                result = future.result(timeout=30)
-                self.send_response(call_id, result)
-            except TimeoutError:
-                self.send_error(call_id, "Operation timed out")
-            except Exception as e:
-                self.send_error(call_id, str(e))
+        def on_settled(ok, value):
+            if ok:
+                self.send_response(call_id, value)
+            else:
+                self.send_error(call_id, value)
 
-        future.add_done_callback(on_future_done)
+        self.when_settled(call_id, True, future, on_settled)
 
     def send_response(self, call_id, result):
-        try:
-            js = f"wito._resolveCall('{call_id}', {json.dumps(result)})"
-            self.api.eval_js(js)
-        except TypeError as e:
-            print(f"Error serializing result: {e}")
-            self.send_error(call_id, "Error serializing result")
+        self.api.deliver('r', call_id, result)
 
     def send_error(self, call_id, error_message):
-        js = f"wito._rejectCall('{call_id}', {json.dumps(error_message)})"
-        self.api.eval_js(js)
-
+        self.api.deliver('e', call_id, error_message)
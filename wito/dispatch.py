@@ -0,0 +1,192 @@
+import typing
+import inspect
+import dataclasses
+from pathlib import Path
+
+
+class ArgumentError(TypeError):
+    pass
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise TypeError
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)):
+        return int(value)
+    raise TypeError
+
+
+def _to_float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError
+    return float(value)
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1):
+        return bool(value)
+    raise TypeError
+
+
+def _to_str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    raise TypeError
+
+
+def _to_path(value):
+    if isinstance(value, str):
+        return Path(value)
+    raise TypeError
+
+
+COERCIONS = {
+    int: _to_int,
+    float: _to_float,
+    bool: _to_bool,
+    str: _to_str,
+    bytes: _to_bytes,
+    Path: _to_path
+}
+
+
+def coercion_for(annotation):
+    """Return a callable converting JSON values to `annotation`, None to pass values through."""
+    if annotation in COERCIONS:
+        return COERCIONS[annotation]
+    if dataclasses.is_dataclass(annotation) and isinstance(annotation, type):
+        def to_dataclass(value):
+            if isinstance(value, annotation):
+                return value
+            if not isinstance(value, dict):
+                raise TypeError
+            return annotation(**value)
+        return to_dataclass
+
+    # Optional[X] and X | None
+    members = typing.get_args(annotation)
+    if type(None) in members and len(members) == 2:
+        inner = coercion_for(next(member for member in members if member is not type(None)))
+        if inner is not None:
+            return lambda value: None if value is None else inner(value)
+    return None
+
+
+def _describe(annotation):
+    return getattr(annotation, '__name__', None) or str(annotation)
+
+
+class Dispatcher:
+    """Precompiled call plan for one exposed method.
+
+    Built once when methods are registered, it holds the parameter names,
+    defaults and coercions derived from type annotations, so each call only
+    binds and converts its arguments. Bad calls raise ArgumentError before
+    the method, or the thread pool behind it, is touched.
+
+    Arguments are either an object of named arguments or an array of
+    positional ones:
+
+    ```javascript
+    await wito._invoke('resize', {width: 640, height: 480});
+    await wito._invoke('resize', [640, 480]);
+    ```
+
+    Annotated int, float, bool, str, bytes, Path and dataclass parameters,
+    optionally wrapped in Optional, are converted from their JSON values.
+    Other annotations are not checked.
+    """
+
+    def __init__(self, name, method, signature=None):
+        self.name = name
+        self.method = method
+        try:
+            hints = typing.get_type_hints(method)
+        except Exception:
+            hints = {}
+
+        self.positional = []
+        self.keyword = {}
+        self.required = []
+        self.coercions = {}
+        self.var_positional = False
+        self.var_keyword = False
+        for param in (signature or inspect.signature(method)).parameters.values():
+            if param.kind is param.VAR_POSITIONAL:
+                self.var_positional = True
+                continue
+            if param.kind is param.VAR_KEYWORD:
+                self.var_keyword = True
+                continue
+            if param.kind is not param.KEYWORD_ONLY:
+                self.positional.append(param.name)
+            if param.kind is not param.POSITIONAL_ONLY:
+                self.keyword[param.name] = param
+            if param.default is param.empty:
+                self.required.append(param.name)
+            annotation = hints.get(param.name, param.annotation)
+            coercion = coercion_for(annotation) if annotation is not param.empty else None
+            if coercion:
+                self.coercions[param.name] = (coercion, annotation)
+        self.positional_only = [name for name in self.positional if name not in self.keyword]
+
+    def bind(self, args):
+        """Turn an Invoke `args` payload into extra positional values and a keyword dict."""
+        extra = ()
+        if args is None:
+            args = {}
+        if isinstance(args, list):
+            if len(args) > len(self.positional):
+                if not self.var_positional:
+                    raise ArgumentError(
+                        f"{self.name}() takes {len(self.positional)} arguments but {len(args)} were given")
+                extra = tuple(args[len(self.positional):])
+            bound = dict(zip(self.positional, args))
+        elif isinstance(args, dict):
+            bound = args
+            if not self.var_keyword:
+                for key in bound:
+                    if key not in self.keyword:
+                        raise ArgumentError(f"{self.name}() got an unexpected argument '{key}'")
+        else:
+            raise ArgumentError(f"Arguments of {self.name}() must be an object or an array")
+
+        for param in self.required:
+            if param not in bound:
+                raise ArgumentError(f"{self.name}() missing required argument '{param}'")
+
+        if self.coercions:
+            bound = dict(bound)
+            for param, (coercion, annotation) in self.coercions.items():
+                if param in bound:
+                    try:
+                        bound[param] = coercion(bound[param])
+                    except (TypeError, ValueError):
+                        raise ArgumentError(
+                            f"{self.name}() argument '{param}' must be {_describe(annotation)}, "
+                            f"got {type(bound[param]).__name__}") from None
+        return extra, bound
+
+    def __call__(self, args):
+        extra, bound = self.bind(args)
+        if self.positional_only or extra:
+            # Every positional parameter is bound when extra values are present
+            bound = dict(bound)
+            leading = [bound.pop(name) for name in self.positional if name in bound and
+                       (extra or name in self.positional_only)]
+            return self.method(*leading, *extra, **bound)
+        return self.method(**bound)
@@ -0,0 +1,79 @@
+import time
+import threading
+
+
+MODES = ('throttle', 'latest', 'batch')
+
+
+class EventPolicy:
+    """Emission policy for one event name.
+
+    Events with a policy are held back and released to JavaScript at most
+    once per interval, or once per main loop iteration without `hz`:
+
+    - 'throttle': at most `hz` events per second, intermediate values are
+      dropped and the latest one is always delivered
+    - 'latest': only the last value emitted since the previous delivery is sent
+    - 'batch': every value emitted since the previous delivery is sent as one
+      array, listeners receive the array
+
+    Example:
+        ```python
+        policy = EventPolicy('throttle', hz=30)
+        ```
+    """
+
+    def __init__(self, mode, hz=None):
+        if mode not in MODES:
+            raise ValueError(f"Event mode must be one of {', '.join(MODES)}, not {mode!r}")
+        if mode == 'throttle' and not hz:
+            raise ValueError("The 'throttle' event mode requires hz")
+        self.mode = mode
+        self.interval = 1 / hz if hz else 0
+        self.lock = threading.Lock()
+        self.pending = []
+        self.scheduled = False
+        self.last_sent = float('-inf')
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a policy from an entry of the `events` config object."""
+        return cls(config.get("mode", "latest"), config.get("hz"))
+
+    def offer(self, data):
+        """Hold `data` back until the next release.
+
+        Returns the delay in seconds before the caller should schedule
+        `take`, or None when a release is already scheduled.
+        """
+        with self.lock:
+            if self.pending and self.mode != 'batch':
+                if self.mode == 'throttle':
+                    self.dropped += 1
+                else:
+                    self.merged += 1
+                self.pending.clear()
+            elif self.pending:
+                self.merged += 1
+            self.pending.append(data)
+            if self.scheduled:
+                return None
+            self.scheduled = True
+            return max(0.0, self.last_sent + self.interval - time.monotonic())
+
+    def take(self):
+        """Return the value to deliver and reset the policy for the next interval."""
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            self.scheduled = False
+            self.last_sent = time.monotonic()
+            self.sent += 1
+        return pending if self.mode == 'batch' else pending[-1]
+
+    def stats(self):
+        with self.lock:
+            return {"mode": self.mode, "sent": self.sent, "dropped": self.dropped, "merged": self.merged}
@@ -5,6 +5,10 @@ from gi.repository import WebKit
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
+from wito.log import get_logger
+
+
+log = get_logger('extensions')
 
 
 @dataclass
@@ -27,13 +31,11 @@ def extension_manager(wito_base_path, app_base_path, dev_mode, api, webview):
 
         if wito_css and wito_css.content:
             _inject_css(webview, wito_css.content, "wito-styles")
-            if dev_mode:
-                print(f"Injected Wito CSS from: {', '.join(wito_css.sources)}")
+            log.debug("Injected Wito CSS from: %s", ', '.join(wito_css.sources))
 
         if app_css and app_css.content:
             _inject_css(webview, app_css.content, "app-styles")  # Fixed: added webview parameter
-            if dev_mode:
-                print(f"Injected App CSS from: {', '.join(app_css.sources)}")
+            log.debug("Injected App CSS from: %s", ', '.join(app_css.sources))
 
         # Merge and inject JavaScript
         wito_js = _merge_files(dev_mode, wito_files['js'], file_type='js')
@@ -41,13 +43,11 @@ def extension_manager(wito_base_path, app_base_path, dev_mode, api, webview):
 
         if wito_js and wito_js.content:
             api.eval_js(wito_js.content)
-            if dev_mode:
-                print(f"Injected Wito JS from: {', '.join(wito_js.sources)}")
+            log.debug("Injected Wito JS from: %s", ', '.join(wito_js.sources))
 
         if app_js and app_js.content:
             api.eval_js(app_js.content)
-            if dev_mode:
-                print(f"Injected App JS from: {', '.join(app_js.sources)}")
+            log.debug("Injected App JS from: %s", ', '.join(app_js.sources))
 
         # Report any errors
         all_errors = []
@@ -57,7 +57,7 @@ def extension_manager(wito_base_path, app_base_path, dev_mode, api, webview):
         _report_errors(all_errors)
 
     except Exception as e:
-        print(f"Error loading extensions: {str(e)}")
+        log.error("Error loading extensions: %s", e)
 
 def _collect_extension_files(base_dir: str) -> Dict[str, List[str]]:
     """Collect all extension files from a directory."""
@@ -84,7 +84,7 @@ def _collect_extension_files(base_dir: str) -> Dict[str, List[str]]:
             elif filename.endswith('.js'):
                 files['js'].append(file_path)
     except Exception as e:
-        print(f"Error collecting files from {ext_dir}: {str(e)}")
+        log.error("Error collecting files from %s: %s", ext_dir, e)
 
     return files
 
@@ -104,7 +104,7 @@ def _merge_files(dev_mode: bool, file_paths: List[str], file_type: str = 'js') -
                 content = Path(file_path).read_text()
             except OSError as e:
                 error_files.append((file_path, str(e)))
-                print(f"Error reading {file_path}: {str(e)}")
+                log.error("Error reading %s: %s", file_path, e)
                 continue
 
             if not content:
@@ -128,7 +128,7 @@ def _merge_files(dev_mode: bool, file_paths: List[str], file_type: str = 'js') -
             
         except Exception as e:
             error_files.append((file_path, str(e)))
-            print(f"Error processing {file_path}: {str(e)}")
+            log.error("Error processing %s: %s", file_path, e)
 
     return MergedContent(
         content="\n".join(merged_content) if merged_content else "",
@@ -157,12 +157,12 @@ def _inject_css(webview, css_content: str, identifier: str):
         )
         webview.content_manager.add_style_sheet(style_sheet)
     except Exception as e:
-        print(f"Error injecting CSS {identifier}: {str(e)}")
+        log.error("Error injecting CSS %s: %s", identifier, e)
 
 def _report_errors(error_files: List[tuple[str, str]]):
     """Report any errors that occurred during file processing."""
     if error_files:
-        print("\nErrors occurred while processing the following files:")
+        log.error("Errors occurred while processing the following files:")
         for file_path, error in error_files:
-            print(f"- {os.path.basename(file_path)}: {error}")
+            log.error("- %s: %s", os.path.basename(file_path), error)
     
\ No newline at end of file
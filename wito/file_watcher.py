@@ -4,6 +4,10 @@ gi.require_version('WebKit', '6.0')
 from gi.repository import GLib
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from wito.log import get_logger
+
+
+log = get_logger('watcher')
 
 
 class FileChangeHandler(FileSystemEventHandler):
@@ -14,10 +18,12 @@ class FileChangeHandler(FileSystemEventHandler):
     def on_modified(self, event):
         if not event.is_directory:
             if event.src_path.endswith(self.files):
+                log.debug("File changed: %s", event.src_path)
                 GLib.idle_add(self.callback)
 
 def setup_file_watcher(app_path, callback=lambda: None, files=()):
     event_handler = FileChangeHandler(callback, files)
     observer = Observer()
     observer.schedule(event_handler, app_path, recursive=True)
-    observer.start()
\ No newline at end of file
+    observer.start()
+    log.debug("Watching %s for changes", app_path)
\ No newline at end of file
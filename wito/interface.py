@@ -1,10 +1,14 @@
 import os
 from functools import wraps
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from gi.repository import Gtk
 from wito.utils import app_base_path
 from wito.bridge import PythonJavaScriptBridge
+from wito import processes
+from wito.tasks import (
+    PRIORITIES, MethodLimits, TaskPool, current_cancel_token, get_pool, pool_stats,
+    ErrorResult, register_pool, submit_with_token)
   
 
 class API(PythonJavaScriptBridge):
@@ -61,18 +65,35 @@ class API(PythonJavaScriptBridge):
     num_cpus = max(os.cpu_count() or 1, 4) # Default to 4 if cpu_count() returns None
     workers = min(num_cpus + 1, 16) # Use the number of CPU cores + 1, but cap it at 16
     executor = ThreadPoolExecutor(workers)
+    default_pool = register_pool(TaskPool("default", workers, executor))
     # print(f"Number of CPUs: {num_cpus}")
     def __init__(self, webview, window, version, wito_dev_mode):
         super().__init__(webview, window, version, wito_dev_mode)
     
     @staticmethod
-    def thread(func):
+    def thread(func=None, *, timeout=None, pool='default', priority='normal',
+               max_concurrent=None, queue_limit=None, on_full='reject'):
         """Decorator that runs a method in a separate Python thread.
 
         This decorator executes the method in a new thread to prevent blocking
         the main thread. Particularly useful for I/O operations or
         long-running tasks.
 
+        Args:
+            timeout (float, optional): Seconds after which the call is cancelled
+                and rejected in JavaScript with "Operation timed out".
+            pool (str): Named pool to run on, declared under `pools` in
+                wito-config.json. Defaults to the shared pool.
+            priority (str): 'high', 'normal' or 'low'. Higher priority calls
+                leave the queue first.
+            max_concurrent (int, optional): Calls of this method allowed to run
+                at the same time, further calls wait in the queue.
+            queue_limit (int, optional): Calls of this method allowed to wait
+                in the queue before new calls are refused.
+            on_full (str): What happens when the queue is full. 'reject' fails
+                the call, 'coalesce' shares the result of an identical queued
+                call and rejects the call if there is none.
+
         Example:
             ```python
             class MyApp(API):
@@ -84,24 +105,129 @@ class API(PythonJavaScriptBridge):
                     def long_operation(self):
                         time.sleep(1)
                         return {"status": "completed"}
+
+                    @expose
+                    @thread(pool='io', max_concurrent=2, queue_limit=100, on_full='coalesce')
+                    def load_thumbnail(self, path):
+                        return Path(path).read_bytes()
+
+                    @expose
+                    @thread(timeout=10, priority='high')
+                    def search(self, query):
+                        token = API.cancel_token()
+                        for path in paths:
+                            token.raise_if_cancelled()
+                            scan(path, query)
+            ```
+
+            ```javascript
+            const controller = new AbortController();
+            const results = wito.search('needle', { signal: controller.signal });
+            controller.abort(); // rejects results and cancels the Python call
             ```
 
         Note:
             - Should be used for I/O or CPU-intensive operations
             - When used with @expose, @thread must be the inner decorator
+            - Calls are cancelled when aborted from JavaScript, on timeout and when
+              the page navigates away. Cancellation is cooperative, check
+              `API.cancel_token()` to stop early.
         """
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            def task():
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    return {"error": str(e)}
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}, not {priority!r}")
+
+        def decorator(func):
+            limits = None
+            if max_concurrent is not None or queue_limit is not None:
+                limits = MethodLimits(func.__name__, max_concurrent, queue_limit, on_full)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                def task():
+                    try:
+                        return func(*args, **kwargs)
+                    except CancelledError:
+                        # Raised by CancelToken.raise_if_cancelled, the call ends as cancelled
+                        raise
+                    except Exception as e:
+                        return ErrorResult(str(e))
+
+                key = None
+                if limits and limits.on_full == 'coalesce':
+                    # Keyed by the arguments themselves, equal hashes alone must not share a result
+                    key = (args, tuple(sorted(kwargs.items())))
+                    try:
+                        hash(key)
+                    except TypeError:
+                        key = None
+
+                task_pool = get_pool(pool)
+                return submit_with_token(
+                    lambda job: task_pool.submit(job, priority, limits, key), task, timeout)
+
+            return wrapper
+
+        if func is None:
+            return decorator
+        return decorator(func)
+
+    @staticmethod
+    def process(func=None, *, timeout=None):
+        """Decorator that runs a method in a separate Python process.
 
-            future = API.executor.submit(task)
-            return future
+        CPU-bound work in @thread methods holds the GIL and competes with the
+        GTK main thread. @process methods run in a pool of worker processes
+        instead, using every core without stalling the interface.
 
-        return wrapper
+        Args:
+            timeout (float, optional): Seconds after which the call is rejected
+                in JavaScript with "Operation timed out".
+
+        Example:
+            ```python
+            class MyApp(API):
+                @API.expose
+                @API.process
+                def compress(self, data):
+                    return zlib.compress(data, 9)
+            ```
+
+        Note:
+            - Only the arguments and the return value are pickled. The method
+              runs with `self` set to None, so it must not use the API instance
+            - The method must be defined at module or class level and its module
+              importable by the worker, guard the application start with
+              `if __name__ == "__main__":`
+            - Workers are started when the application starts, their number is
+              set with `processWorkers` in wito-config.json
+            - When used with @expose, @process must be the inner decorator
+        """
+        def decorator(func):
+            processes.check_importable(func)
+            processes.declared = True
+            is_method = '.' in func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                future = processes.submit(func, is_method, args[1:] if is_method else args, kwargs)
+                future.wito_timeout = timeout
+                return future
+
+            return wrapper
+
+        if func is None:
+            return decorator
+        return decorator(func)
+
+    @staticmethod
+    def cancel_token():
+        """Get the CancelToken of the @thread call running on the current thread.
+
+        Returns:
+            CancelToken: The call's token, or a token that is never cancelled
+                when called outside of a @thread call.
+        """
+        return current_cancel_token()
 
     @staticmethod
     def expose(func):
@@ -133,11 +259,59 @@ class API(PythonJavaScriptBridge):
         Note:
             - All exposed methods become async in JavaScript
             - Return values must be JSON-serializable
-            - Can be combined with @thread decorator
+            - bytes, bytearray and memoryview results arrive in JavaScript as a Uint8Array
+            - ArrayBuffer and typed array arguments arrive in Python as bytes
+            - `async def` methods run on a shared asyncio event loop thread, use
+              `GLib.idle_add` to touch GTK objects from them
+            - Generators and async generators become async iterators in JavaScript,
+              each yielded chunk is sent as soon as it is produced:
+              `for await (const line of wito.tail_log(path)) { ... }`
+            - Can be combined with @thread or @process decorator
         """
         func._exposed = True
         return func
 
+    @staticmethod
+    def route(prefix):
+        """Decorator that serves a method's return value on a wito:// URL prefix.
+
+        The method is called with the rest of the path after the prefix and the
+        query parameters, and its return value becomes the response body. This
+        lets `fetch()` pull large binary data without JSON or base64 round trips.
+
+        Return values:
+            - bytes, bytearray or memoryview: sent as application/octet-stream
+            - str: sent as text/plain
+            - dict or list: sent as application/json
+            - file-like object: streamed in chunks and closed when done
+            - (body, content_type) tuple: any of the above with an explicit type
+            - None: answered with "File not found"
+
+        Example:
+            ```python
+            class MyApp(API):
+                @API.route('api/tiles/')
+                @API.thread
+                def tiles(self, path, params):
+                    z, x, y = path.removesuffix('.png').split('/')
+                    return render_tile(int(z), int(x), int(y)), 'image/png'
+            ```
+
+            ```javascript
+            // Relative to the page, which is served from wito://index.html/
+            const response = await fetch('api/tiles/3/4/2.png');
+            const buffer = await response.arrayBuffer();
+            ```
+
+        Note:
+            - Can be combined with @thread, the response is sent when the Future completes
+            - The longest matching prefix wins over files in the application directory
+        """
+        def decorator(func):
+            func._route = prefix.lstrip('/')
+            return func
+        return decorator
+
     @expose
     def get_theme_mode(self):
         """Get the current theme mode of the application.
@@ -161,6 +335,47 @@ class API(PythonJavaScriptBridge):
             "is_light": not is_dark
         }
 
+    @expose
+    def pool_stats(self):
+        """Get queue and wait time statistics of the thread pools.
+
+        Returns:
+            dict: Statistics keyed by pool name
+                - workers (int): Worker threads of the pool
+                - running (int): Calls currently running
+                - queued (int): Calls waiting for a worker
+                - submitted, completed, rejected, coalesced (int): Call counters
+                - wait_avg_ms, wait_max_ms (float): Time calls spent in the queue
+
+        JavaScript Usage:
+            ```javascript
+            const stats = await wito.pool_stats();
+            console.log('Queued calls:', stats.default.queued);
+            ```
+        """
+        return pool_stats()
+
+    @expose
+    def bridge_stats(self):
+        """Get per-method call statistics of the bridge.
+
+        Returns:
+            dict: Statistics keyed by method name
+                - calls, errors, cancelled (int): Call, error and cancellation counts
+                - queue_wait_ms, exec_ms, serialize_ms (dict): Time histograms
+                - request_bytes, response_bytes (dict): Payload size histograms
+
+            Each histogram holds count, avg, min, max, p50, p95, p99 and the
+            bucket counts. Percentiles are bucket upper bounds.
+
+        JavaScript Usage:
+            ```javascript
+            const stats = await wito.bridge_stats();
+            console.log('p95 of load_file:', stats.load_file.exec_ms.p95);
+            ```
+        """
+        return self.stats.snapshot()
+
     @expose
     def screen_get_info(self):
         from wito.screen import get_info
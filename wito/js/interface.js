@@ -1,3 +1,87 @@
+class WitoStore {
+    constructor(wito) {
+        this.wito = wito;
+        this.state = {};
+        this.listeners = [];
+        this.outgoing = [];
+    }
+
+    _path(path) {
+        if (Array.isArray(path)) return path.map(String);
+        if (path === '') return [];
+        return path.slice(1).split('/').map(key => key.replace(/~1/g, '/').replace(/~0/g, '~'));
+    }
+
+    _pointer(keys) {
+        return keys.map(key => '/' + String(key).replace(/~/g, '~0').replace(/\//g, '~1')).join('');
+    }
+
+    get(path = '') {
+        let node = this.state;
+        for (const key of this._path(path)) {
+            if (node === null || typeof node !== 'object') return undefined;
+            node = node[key];
+        }
+        return node;
+    }
+
+    set(path, value) {
+        const keys = this._path(path);
+        const parent = this.get(keys.slice(0, -1));
+        const key = keys[keys.length - 1];
+        const op = Array.isArray(parent) && (key === '-' || Number(key) >= parent.length) ? 'add' : 'replace';
+        this._write({ op, path: this._pointer(keys), value });
+    }
+
+    delete(path) {
+        this._write({ op: 'remove', path: this._pointer(this._path(path)) });
+    }
+
+    subscribe(callback) {
+        this.listeners.push(callback);
+        return () => {
+            this.listeners = this.listeners.filter(listener => listener !== callback);
+        };
+    }
+
+    _write(op) {
+        this._apply([op]);
+        this.outgoing.push(op);
+        if (this.outgoing.length === 1) {
+            // Writes made in the same task reach Python as one message
+            queueMicrotask(() => {
+                const ops = this.outgoing;
+                this.outgoing = [];
+                window.webkit.messageHandlers.Invoke.postMessage(JSON.stringify({ store: ops }, this.wito._encodeArg));
+            });
+        }
+    }
+
+    _apply(ops) {
+        ops.forEach(({ op, path, value }) => {
+            const keys = this._path(path);
+            if (!keys.length) {
+                this.state = value;
+                return;
+            }
+            const parent = this.get(keys.slice(0, -1));
+            if (parent === null || typeof parent !== 'object') return;
+            const key = keys[keys.length - 1];
+            if (Array.isArray(parent)) {
+                if (key === '-') parent.push(value);
+                else if (op === 'add') parent.splice(Number(key), 0, value);
+                else if (op === 'replace') parent[Number(key)] = value;
+                else parent.splice(Number(key), 1);
+            } else if (op === 'remove') {
+                delete parent[key];
+            } else {
+                parent[key] = value;
+            }
+        });
+        this.listeners.forEach(callback => callback(this.state, ops));
+    }
+}
+
 class Wito {
     constructor() {
         this.callId = 0;
@@ -7,6 +91,12 @@ class Wito {
         this.isReady = false;
         this.devMode = false;
         this.appDevMode = false
+        this.batchCalls = false;
+        this.transport = 'eval';
+        this.streams = {};
+        this.streamWindow = 16;
+        this.callQueue = [];
+        this.store = new WitoStore(this);
     }
 
     _initializeBindings = function() {
@@ -14,36 +104,317 @@ class Wito {
         // PROPERTY_BINDINGS_PLACEHOLDER
     };
 
-    _invoke(method, args) {
+    _invoke(method, args, options) {
+        const signal = options && options.signal;
         return new Promise((resolve, reject) => {
+            if (signal && signal.aborted) {
+                reject(signal.reason || new DOMException('The operation was aborted.', 'AbortError'));
+                return;
+            }
             const id = this.callId++;
             this.pendingCalls[id] = { resolve, reject };
             if (window.webkit && window.webkit.messageHandlers && window.webkit.messageHandlers.Invoke) {
-                const message = JSON.stringify({ id, method, args });
-                if (this.devMode) console.log(`Sending message to Python: ${message}`);
-                window.webkit.messageHandlers.Invoke.postMessage(message);
+                if (signal) {
+                    const onAbort = () => this._abortCall(id, signal);
+                    signal.addEventListener('abort', onAbort, { once: true });
+                    this.pendingCalls[id].cleanup = () => signal.removeEventListener('abort', onAbort);
+                }
+                if (this.batchCalls) {
+                    this._queueCall({ id, method, args });
+                    return;
+                }
+                this._post({ id, method, args });
             } else {
                 let msg = "WebKit message handlers not available"
                 console.error(msg);
+                delete this.pendingCalls[id];
                 reject(new Error(msg));
             }
         });
     }
+
+    _takeCall(id) {
+        const call = this.pendingCalls[id];
+        if (call) {
+            delete this.pendingCalls[id];
+            if (call.cleanup) call.cleanup();
+        }
+        return call;
+    }
+
+    _abortCall(id, signal) {
+        const call = this._takeCall(id);
+        if (!call) return;
+        call.reject(signal.reason || new DOMException('The operation was aborted.', 'AbortError'));
+        const queued = this.callQueue.findIndex(queuedCall => queuedCall.id === id);
+        if (queued !== -1) {
+            // Not sent yet, Python never hears about it
+            this.callQueue.splice(queued, 1);
+        } else {
+            this._control({ cancel: id });
+        }
+    }
+
+    _stream(method, args, options) {
+        const signal = options && options.signal;
+        const id = this.callId++;
+        this.streams[id] = { chunks: [], waiters: [], done: false, error: null, consumed: 0 };
+        if (signal) {
+            signal.addEventListener('abort', () => {
+                const stream = this.streams[id];
+                if (!stream || stream.done) return;
+                stream.chunks = [];
+                this._endStream(id, signal.reason || new DOMException('The operation was aborted.', 'AbortError'));
+                this._control({ cancel: id });
+            }, { once: true });
+        }
+        const call = { id, method, args, stream: true };
+        if (this.batchCalls) {
+            this._queueCall(call);
+        } else {
+            this._post(call);
+        }
+        const self = this;
+        return {
+            [Symbol.asyncIterator]() { return this; },
+            next() { return self._nextChunk(id); },
+            return() {
+                self._cancelStream(id);
+                return Promise.resolve({ value: undefined, done: true });
+            }
+        };
+    }
+
+    _nextChunk(id) {
+        const stream = this.streams[id];
+        if (!stream) {
+            return Promise.resolve({ value: undefined, done: true });
+        }
+        if (stream.chunks.length) {
+            const chunk = stream.chunks.shift();
+            this._ackChunk(id, stream);
+            return Promise.resolve(chunk).then(value => ({ value, done: false }));
+        }
+        if (stream.error) {
+            delete this.streams[id];
+            return Promise.reject(stream.error);
+        }
+        if (stream.done) {
+            delete this.streams[id];
+            return Promise.resolve({ value: undefined, done: true });
+        }
+        return new Promise(resolve => stream.waiters.push(resolve)).then(() => this._nextChunk(id));
+    }
+
+    _ackChunk(id, stream) {
+        // Python only runs streamWindow chunks ahead, consumed chunks hand credit back
+        stream.consumed++;
+        if (stream.consumed >= Math.max(1, this.streamWindow / 2)) {
+            this._control({ ack: id, n: stream.consumed });
+            stream.consumed = 0;
+        }
+    }
+
+    _pushChunk(id, value) {
+        const stream = this.streams[id];
+        if (!stream || stream.done) return;
+        stream.chunks.push(this._decode(value));
+        this._wakeStream(stream);
+    }
+
+    _endStream(id, error) {
+        const stream = this.streams[id];
+        if (!stream) return;
+        stream.done = true;
+        if (error) stream.error = error instanceof Error || error instanceof DOMException ? error : new Error(error);
+        this._wakeStream(stream);
+    }
+
+    _wakeStream(stream) {
+        const waiters = stream.waiters;
+        stream.waiters = [];
+        waiters.forEach(resolve => resolve());
+    }
+
+    _cancelStream(id) {
+        if (!this.streams[id]) return;
+        delete this.streams[id];
+        this._control({ cancel: id });
+    }
+
+    _control(message) {
+        window.webkit.messageHandlers.Invoke.postMessage(JSON.stringify(message));
+    }
+
+    _queueCall(call) {
+        this.callQueue.push(call);
+        if (this.callQueue.length === 1) {
+            // Calls made in the same task are flushed together as one message
+            queueMicrotask(() => this._flushCalls());
+        }
+    }
+
+    _flushCalls() {
+        const batch = this.callQueue;
+        this.callQueue = [];
+        if (this.devMode) console.log(`Sending batch of ${batch.length} calls to Python`);
+        this._post({ batch });
+    }
+
+    _post(payload) {
+        const message = JSON.stringify(payload, this._encodeArg);
+        if (this.devMode) console.log(`Sending message to Python: ${message}`);
+        const handlers = window.webkit.messageHandlers;
+        if (this.transport !== 'reply' || !handlers.InvokeReply) {
+            handlers.Invoke.postMessage(message);
+            return;
+        }
+        // The reply carries the result as a value, no generated source is evaluated
+        const calls = payload.batch || [payload];
+        handlers.InvokeReply.postMessage(message).then(
+            result => {
+                if (payload.batch) {
+                    Promise.resolve(this._decode(result)).then(results =>
+                        results.forEach(([ok, value], index) => this._settleCall(calls[index].id, ok, value)));
+                } else {
+                    this._settleCall(payload.id, true, result);
+                }
+            },
+            error => calls.forEach(call => this._settleCall(call.id, false, error.message || String(error)))
+        );
+    }
+
+    _settleCall(id, ok, value) {
+        if (this.streams[id]) {
+            if (!ok) this._endStream(id, value);
+            return;
+        }
+        const call = this._takeCall(id);
+        if (!call) {
+            console.warn(`No pending call found for id: ${id}`);
+            return;
+        }
+        if (ok) {
+            call.resolve(this._decode(value));
+        } else {
+            call.reject(new Error(value));
+        }
+    }
+
+    _deliver(items) {
+        items.forEach(([kind, target, value]) => {
+            if (kind === 'r') {
+                this._resolveCall(target, value);
+            } else if (kind === 'e') {
+                if (this.streams[target]) {
+                    this._endStream(target, value);
+                } else {
+                    this._rejectCall(target, value);
+                }
+            } else if (kind === 'c') {
+                this._pushChunk(target, value);
+            } else if (kind === 'd') {
+                this._endStream(target);
+            } else if (kind === 's') {
+                const ops = this._decode(value);
+                if (ops instanceof Promise) {
+                    ops.then(decoded => this.store._apply(decoded));
+                } else {
+                    this.store._apply(ops);
+                }
+            } else if (kind === 'v') {
+                const data = this._decode(value);
+                if (data instanceof Promise) {
+                    data.then(decoded => this._emitEvent(target, decoded));
+                } else {
+                    this._emitEvent(target, data);
+                }
+            }
+        });
+    }
     
+    _encodeArg = (key, value) => {
+        if (value instanceof ArrayBuffer || ArrayBuffer.isView(value)) {
+            return { $wito: 'bytes', b64: this._toBase64(value) };
+        }
+        return value;
+    };
+
+    _decode(value) {
+        // Only payloads wrapped in a tagged envelope by Python contain binary markers
+        if (value === null || typeof value !== 'object' || value.$wito !== 'tagged') {
+            return value;
+        }
+        const fetches = [];
+        const revive = (node, parent, key) => {
+            if (node === null || typeof node !== 'object') return;
+            if (typeof node.$wito === 'string') {
+                const decoded = this._decodeTagged(node);
+                if (decoded instanceof Promise) {
+                    fetches.push(decoded.then(result => { parent[key] = result; }));
+                } else {
+                    parent[key] = decoded;
+                }
+                return;
+            }
+            for (const child in node) revive(node[child], node, child);
+        };
+        const root = { value: value.value };
+        revive(root.value, root, 'value');
+        return fetches.length ? Promise.all(fetches).then(() => root.value) : root.value;
+    }
+
+    _decodeTagged(node) {
+        switch (node.$wito) {
+            case 'bytes':
+                return this._fromBase64(node.b64);
+            case 'date':
+                return new Date(node.value);
+            case 'set':
+                return new Set(node.value.map(item => this._decode({ $wito: 'tagged', value: item })));
+            case 'blob':
+                return fetch(node.url)
+                    .then(response => response.arrayBuffer())
+                    .then(buffer => new Uint8Array(buffer));
+            default:
+                return node;
+        }
+    }
+
+    _toBase64(value) {
+        const bytes = value instanceof ArrayBuffer
+            ? new Uint8Array(value)
+            : new Uint8Array(value.buffer, value.byteOffset, value.byteLength);
+        if (bytes.toBase64) return bytes.toBase64();
+        let binary = '';
+        for (let i = 0; i < bytes.length; i += 0x8000) {
+            binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+        }
+        return btoa(binary);
+    }
+
+    _fromBase64(b64) {
+        if (Uint8Array.fromBase64) return Uint8Array.fromBase64(b64);
+        const binary = atob(b64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+        return bytes;
+    }
+
     _resolveCall(id, result) {
         console.log(`_resolveCall invoked for id ${id}`);
-        if (this.pendingCalls[id]) {
+        const call = this._takeCall(id);
+        if (call) {
             if (this.devMode) console.log(`Found pending call for id ${id}`);
             try {
-                let parsedResult = (typeof result === 'string') ? JSON.parse(result) : result;
+                let parsedResult = this._decode((typeof result === 'string') ? JSON.parse(result) : result);
                 if (this.devMode) console.log(`Parsed result:`, parsedResult);
-                this.pendingCalls[id].resolve(parsedResult);
+                call.resolve(parsedResult);
                 if (this.devMode) console.log(`Promise resolved for id ${id}`);
             } catch (error) {
                 console.error(`Error in _resolveCall for id ${id}:`, error);
-                this.pendingCalls[id].reject(error);
+                call.reject(error);
             }
-            delete this.pendingCalls[id];
         } else {
             console.warn(`No pending call found for id: ${id}`);
         }
@@ -51,9 +422,9 @@ class Wito {
     
     _rejectCall(id, error) {
         if (this.devMode) console.log(`_rejectCall invoked for id ${id}`);
-        if (this.pendingCalls[id]) {
-            this.pendingCalls[id].reject(new Error(error));
-            delete this.pendingCalls[id];
+        const call = this._takeCall(id);
+        if (call) {
+            call.reject(new Error(error));
         } else {
             console.warn(`No pending call found for id: ${id}`);
         }
@@ -62,8 +433,29 @@ class Wito {
     on(event, callback) {
         if (!this.eventListeners[event]) {
             this.eventListeners[event] = [];
+            // Python skips events the page does not listen to
+            this._subscription({ subscribe: event });
         }
         this.eventListeners[event].push(callback);
+        return () => this.off(event, callback);
+    }
+
+    off(event, callback) {
+        const listeners = this.eventListeners[event];
+        if (!listeners) return;
+        const remaining = callback ? listeners.filter(listener => listener !== callback) : [];
+        if (remaining.length) {
+            this.eventListeners[event] = remaining;
+        } else {
+            delete this.eventListeners[event];
+            this._subscription({ unsubscribe: event });
+        }
+    }
+
+    _subscription(message) {
+        if (window.webkit && window.webkit.messageHandlers && window.webkit.messageHandlers.Invoke) {
+            this._control(message);
+        }
     }
 
     _emitEvent(event, data) {
@@ -86,6 +478,40 @@ class Wito {
         this.readyCallbacks = [];
     }
 
+    static lazy(target, methods) {
+        // Binding functions are created the first time a method is accessed
+        const create = name => {
+            const [params, stream] = methods[name];
+            const binding = function(...args) {
+                const named = {};
+                params.forEach((param, index) => {
+                    if (index < args.length) named[param] = args[index];
+                });
+                return stream
+                    ? target._stream(name, named, args[params.length])
+                    : target._invoke(name, named, args[params.length]);
+            };
+            Object.defineProperty(target, name, { value: binding, writable: true, configurable: true, enumerable: true });
+            return binding;
+        };
+        const isLazy = (prop) => typeof prop === 'string' && !(prop in target) && Object.hasOwn(methods, prop);
+        return new Proxy(target, {
+            get(target, prop, receiver) {
+                return isLazy(prop) ? create(prop) : Reflect.get(target, prop, receiver);
+            },
+            has(target, prop) {
+                return isLazy(prop) || Reflect.has(target, prop);
+            },
+            ownKeys(target) {
+                return [...new Set([...Reflect.ownKeys(target), ...Object.keys(methods)])];
+            },
+            getOwnPropertyDescriptor(target, prop) {
+                if (isLazy(prop)) create(prop);
+                return Reflect.getOwnPropertyDescriptor(target, prop);
+            }
+        });
+    }
+
     getAllObjects() {
         const objects = Object.getOwnPropertyNames(wito)
         .filter(object => wito[object])
@@ -108,11 +534,15 @@ class Wito {
     };
 }
 
-const wito = new Wito();
+const witoLazyMethods = // LAZY_METHODS_PLACEHOLDER;
+const wito = witoLazyMethods ? Wito.lazy(new Wito(), witoLazyMethods) : new Wito();
 wito._initializeBindings();
 wito._setReady();
 wito.devMode = // WITO_DEV_MODE_PLACEHOLDER;
 wito.appDevMode = // APP_DEV_MODE_PLACEHOLDER;
+wito.batchCalls = // BATCH_CALLS_PLACEHOLDER;
+wito.transport = // TRANSPORT_PLACEHOLDER;
+wito.streamWindow = // STREAM_WINDOW_PLACEHOLDER;
 console.log('Wito Ready');
 console.log(`Framework Debug: ${wito.devMode}', 'Application Debug: ${wito.appDevMode}`);
 
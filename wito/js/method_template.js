@@ -1,3 +1,3 @@
 this.METHOD_NAME = function(PARAMS) {
-    return this._invoke('METHOD_NAME', {ARGS_OBJECT});
-};
\ No newline at end of file
+    return this._invoke('METHOD_NAME', {ARGS_OBJECT}, arguments[PARAM_COUNT]);
+};
@@ -0,0 +1,3 @@
+this.METHOD_NAME = function(PARAMS) {
+    return this._stream('METHOD_NAME', {ARGS_OBJECT}, arguments[PARAM_COUNT]);
+};
@@ -0,0 +1,107 @@
+"""Logging for wito's internals.
+
+Every area has its own logger below `wito`:
+
+| Logger            | Covers                                        |
+|-------------------|-----------------------------------------------|
+| wito.bridge       | JavaScript calls, results, events, pending JS |
+| wito.protocol     | wito:// requests, routes and asset bundles    |
+| wito.extensions   | CSS and JavaScript extensions                 |
+| wito.watcher      | dev-mode file watcher                         |
+
+Debug messages are only formatted when their logger is enabled, and payloads
+such as evaluated scripts or call results are passed through `truncate` so a
+large payload never turns into megabytes of log output.
+
+Example:
+    ```python
+    from wito.log import get_logger, truncate
+
+    log = get_logger('bridge')
+    log.debug("Method result: %s", truncate(result))
+    ```
+"""
+import sys
+import json
+import logging
+
+
+AREAS = ('bridge', 'protocol', 'extensions', 'watcher')
+DEFAULT_TRUNCATE = 500
+
+_max_length = DEFAULT_TRUNCATE
+_handlers = []
+
+
+def get_logger(area):
+    return logging.getLogger(f"wito.{area}")
+
+
+class truncate:
+    """Formats `value` lazily, cutting it to the configured maximum length."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if _max_length and len(text) > _max_length:
+            return f"{text[:_max_length]}... ({len(text)} chars)"
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname.lower(),
+            "area": record.name.removeprefix("wito."),
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def _level(name):
+    return getattr(logging, str(name).upper())
+
+
+def configure_logging(wito_config):
+    """Set up the `wito` loggers from the `logging` config object.
+
+    Debug output is enabled with `witoDevMode` unless a level is configured.
+    Warnings and errors are always written to stderr.
+    """
+    global _max_length
+    config = wito_config.get("logging") or {}
+    _max_length = config.get("truncate", DEFAULT_TRUNCATE)
+
+    root = logging.getLogger("wito")
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+
+    default = "debug" if wito_config.get("witoDevMode") else "warning"
+    root.setLevel(_level(config.get("level", default)))
+    for area in AREAS:
+        get_logger(area).setLevel(logging.NOTSET)
+    for area, level in (config.get("areas") or {}).items():
+        get_logger(area).setLevel(_level(level))
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter("[%(name)s] %(message)s"))
+    _handlers.append(console)
+    if config.get("jsonFile"):
+        sink = logging.FileHandler(config["jsonFile"])
+        sink.setFormatter(JsonLinesFormatter())
+        _handlers.append(sink)
+    for handler in _handlers:
+        root.addHandler(handler)
+    # wito writes its own output, records are not passed on to the application's handlers
+    root.propagate = False
@@ -0,0 +1,77 @@
+import os
+import pickle
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+_executor = None
+_workers = None
+_lock = threading.Lock()
+declared = False
+
+
+def configure(workers=None):
+    """Set the size of the process pool, must be called before its first use."""
+    global _workers
+    _workers = workers
+
+
+def get_executor():
+    """Return the shared process pool, starting it on first use.
+
+    Workers are started from a forkserver rather than forked from the GTK
+    process, so they never inherit the main loop, GTK state or locks held by
+    other threads.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = _workers or os.cpu_count() or 1
+            context = multiprocessing.get_context('forkserver')
+            _executor = ProcessPoolExecutor(workers, mp_context=context)
+        return _executor
+
+
+def warm_up():
+    """Start every worker process ahead of the first call.
+
+    Returns immediately, the workers boot in the background.
+    """
+    executor = get_executor()
+    for _ in range(executor._max_workers):
+        executor.submit(os.getpid)
+
+
+def check_importable(func):
+    """Raise TypeError when a worker process could not import `func`."""
+    if '<locals>' in func.__qualname__ or '<lambda>' in func.__qualname__:
+        raise TypeError(
+            f"@process method '{func.__qualname__}' must be defined at module or class level "
+            "so worker processes can import it")
+
+
+def submit(func, is_method, args, kwargs):
+    """Run `func` in the process pool, returning a concurrent Future.
+
+    Only the arguments are pickled, `func` is imported by the worker from its
+    module and qualified name. Methods are called with `self` set to None, the
+    API instance stays in the GTK process.
+    """
+    try:
+        payload = pickle.dumps((args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise TypeError(f"Arguments of @process method '{func.__qualname__}' are not picklable: {e}") from None
+    return get_executor().submit(_call, func.__module__, func.__qualname__, is_method, payload)
+
+
+def _call(module, qualname, is_method, payload):
+    target = importlib.import_module(module)
+    for name in qualname.split('.'):
+        target = getattr(target, name)
+    target = getattr(target, '__wrapped__', target)
+    args, kwargs = pickle.loads(payload)
+    if is_method:
+        return target(None, *args, **kwargs)
+    return target(*args, **kwargs)
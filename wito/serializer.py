@@ -0,0 +1,212 @@
+import json
+import base64
+import secrets
+import threading
+import dataclasses
+from enum import Enum
+from time import monotonic
+from collections import OrderedDict
+from uuid import UUID
+from pathlib import PurePath
+from decimal import Decimal
+from datetime import date, datetime, time
+from wito.log import get_logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+log = get_logger('bridge')
+
+BLOB_ROUTE = '__wito__/blob/'
+BLOB_URL = f'wito://index.html/{BLOB_ROUTE}'
+INLINE_BYTES_LIMIT = 4096
+BLOB_TTL = 60
+BLOB_MAX_BYTES = 256 * 1024 * 1024
+
+
+class BlobStore:
+    """Holds binary results until the page fetches them over wito://.
+
+    Each blob is served once from `BLOB_URL + token` and dropped afterwards,
+    so large buffers reach JavaScript as raw response bodies instead of
+    base64 text inside a JSON payload.
+
+    The page never fetches blobs of results it discards, such as those of
+    aborted calls, so blobs also expire after `ttl` seconds and the oldest
+    are dropped once more than `max_bytes` are held.
+    """
+
+    def __init__(self, ttl=BLOB_TTL, max_bytes=BLOB_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._blobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, data):
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._prune(monotonic())
+            self._blobs[token] = (data, monotonic() + self.ttl)
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes and len(self._blobs) > 1:
+                self._drop(next(iter(self._blobs)))
+        return BLOB_URL + token
+
+    def pop(self, token):
+        with self._lock:
+            if token not in self._blobs:
+                return None
+            data, expires = self._drop(token)
+            return data if expires > monotonic() else None
+
+    def _drop(self, token):
+        entry = self._blobs.pop(token)
+        self.current_bytes -= len(entry[0])
+        return entry
+
+    def _prune(self, now):
+        # Blobs are kept in insertion order and share one ttl, so the expired ones come first
+        while self._blobs:
+            token, (_, expires) = next(iter(self._blobs.items()))
+            if expires > now:
+                break
+            self._drop(token)
+
+    def clear(self):
+        with self._lock:
+            self._blobs.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._blobs)
+
+
+class Serializer:
+    """Encodes bridge payloads for JavaScript and decodes Invoke messages.
+
+    Values JSON cannot express are written as `{"$wito": <type>, ...}` markers
+    and the whole payload is wrapped in a `{"$wito": "tagged"}` envelope, so
+    the JavaScript side only walks results that actually contain markers.
+
+    Uses orjson when it is installed and falls back to the standard library
+    json module otherwise. With rich types enabled these are encoded as well:
+
+    | Python                         | JavaScript               |
+    |--------------------------------|--------------------------|
+    | bytes, bytearray, memoryview   | Uint8Array               |
+    | datetime, date                 | Date                     |
+    | set, frozenset                 | Set                      |
+    | time, Decimal, UUID, Path      | string                   |
+    | Enum                           | the member's value       |
+    | dataclass instance             | object                   |
+    | NumPy array or scalar          | array or number          |
+
+    Small buffers are inlined as base64, larger ones are fetched from the blob
+    store as raw bytes. `{"$wito": "bytes"}` markers sent by JavaScript for
+    `ArrayBuffer` and typed array arguments are decoded back to bytes.
+
+    Example:
+        ```python
+        from wito.serializer import Serializer
+
+        serializer = Serializer(backend="json")
+        serializer.register(complex, lambda value: [value.real, value.imag])
+        ```
+    """
+
+    def __init__(self, blobs=None, backend="auto", rich_types=True):
+        self.blobs = blobs or BlobStore()
+        self.backend = self.select_backend(backend)
+        self.encoders = []
+        self.register(bytes, self.encode_bytes)
+        self.register(bytearray, self.encode_bytes)
+        self.register(memoryview, self.encode_bytes)
+        if rich_types:
+            self.register(datetime, lambda value: {"$wito": "date", "value": value.isoformat()})
+            self.register(date, lambda value: {"$wito": "date", "value": value.isoformat()})
+            self.register(time, lambda value: value.isoformat())
+            self.register((set, frozenset), lambda value: {"$wito": "set", "value": list(value)})
+            self.register((Decimal, UUID, PurePath), str)
+            self.register(Enum, lambda value: value.value)
+
+    @classmethod
+    def from_config(cls, config, blobs=None):
+        """Build a serializer from the `serializer` config object."""
+        config = config or {}
+        return cls(blobs, config.get("backend", "auto"), config.get("richTypes", True))
+
+    @staticmethod
+    def select_backend(backend):
+        if backend == "orjson" and orjson is None:
+            log.warning("orjson is not installed, falling back to json")
+            return "json"
+        if backend == "auto":
+            return "orjson" if orjson else "json"
+        return backend
+
+    def register(self, types, encoder):
+        """Register `encoder(value)` for instances of `types`.
+
+        The encoder returns any JSON-serializable value, which may contain
+        further registered types. Later registrations take precedence.
+        """
+        self.encoders.insert(0, (types, encoder))
+
+    def dumps(self, value):
+        tagged = False
+
+        def default(obj):
+            nonlocal tagged
+            encoded = self.encode(obj)
+            if isinstance(encoded, dict) and "$wito" in encoded:
+                tagged = True
+            return encoded
+
+        payload = None
+        if self.backend == "orjson":
+            try:
+                payload = orjson.dumps(
+                    value,
+                    default=default,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+                ).decode()
+            except orjson.JSONEncodeError:
+                # orjson rejects some values json accepts, such as integers above 64 bits
+                tagged = False
+        if payload is None:
+            payload = json.dumps(value, default=default)
+        if tagged:
+            return f'{{"$wito":"tagged","value":{payload}}}'
+        return payload
+
+    def encode(self, obj):
+        for types, encoder in self.encoders:
+            if isinstance(obj, types):
+                return encoder(obj)
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+        if hasattr(obj, 'tolist') and type(obj).__module__ == 'numpy':
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def encode_bytes(self, obj):
+        data = bytes(obj)
+        if len(data) <= INLINE_BYTES_LIMIT:
+            return {"$wito": "bytes", "b64": base64.b64encode(data).decode('ascii')}
+        return {"$wito": "blob", "url": self.blobs.put(data)}
+
+    def loads(self, message):
+        if '"$wito"' in message:
+            return json.loads(message, object_hook=self.decode)
+        if self.backend == "orjson":
+            return orjson.loads(message)
+        return json.loads(message)
+
+    def decode(self, obj):
+        if obj.get("$wito") == "bytes":
+            return base64.b64decode(obj["b64"])
+        return obj
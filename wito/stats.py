@@ -0,0 +1,206 @@
+import json
+import time
+import bisect
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from wito.log import get_logger
+from wito.tasks import ErrorResult
+
+
+log = get_logger('bridge')
+
+
+TIME_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+METRICS = {
+    "queue_wait_ms": TIME_BUCKETS_MS,
+    "exec_ms": TIME_BUCKETS_MS,
+    "serialize_ms": TIME_BUCKETS_MS,
+    "request_bytes": SIZE_BUCKETS,
+    "response_bytes": SIZE_BUCKETS
+}
+MAX_TRACKED_CALLS = 10000
+
+
+class Histogram:
+    """Fixed bucket histogram, percentiles are reported as bucket upper bounds."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": buckets
+        }
+
+
+class MethodStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.histograms = {metric: Histogram(bounds) for metric, bounds in METRICS.items()}
+
+    def to_dict(self):
+        stats = {"calls": self.calls, "errors": self.errors, "cancelled": self.cancelled}
+        for metric, histogram in self.histograms.items():
+            stats[metric] = histogram.to_dict()
+        return stats
+
+
+class BridgeStats:
+    """Per-method call statistics of the JavaScript bridge.
+
+    Records call, error and cancellation counts plus histograms of queue wait, execution
+    time, serialization time and request and response sizes for every
+    exposed method. Available in Python as `self.stats.snapshot()` and in
+    JavaScript as `wito.bridge_stats()`.
+
+    Example:
+        ```python
+        slow = {name: method["exec_ms"]["p95"] for name, method in self.stats.snapshot().items()}
+        ```
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.methods = {}
+        self.calls = OrderedDict()
+        self.lock = threading.Lock()
+        self.dump_stop = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Build stats from the `stats` config object, starting the periodic dump if set."""
+        config = config or {}
+        stats = cls(config.get("enabled", True))
+        if stats.enabled and config.get("dumpFile"):
+            stats.start_dump(config["dumpFile"], config.get("dumpInterval", 60))
+        return stats
+
+    def _method(self, method):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        return stats
+
+    def call(self, method, call_id=None, request_bytes=None):
+        """Count a call, remembering its method until its result is serialized."""
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self._method(method)
+            stats.calls += 1
+            if request_bytes is not None:
+                stats.histograms["request_bytes"].record(request_bytes)
+            if call_id is not None:
+                self.calls[call_id] = method
+                if len(self.calls) > MAX_TRACKED_CALLS:
+                    self.calls.popitem(last=False)
+
+    def error(self, method):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._method(method).errors += 1
+
+    def cancel(self, method):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._method(method).cancelled += 1
+
+    def record(self, method, metric, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._method(method).histograms[metric].record(value)
+
+    def finish(self, call_id):
+        """Forget a call and return its method name, None if it was not tracked."""
+        with self.lock:
+            return self.calls.pop(call_id, None)
+
+    def record_future(self, method, future, started):
+        """Record queue wait, execution time and errors once `future` is done."""
+        def on_done(future):
+            wait = getattr(future, 'wito_queue_wait', None)
+            if wait is not None:
+                self.record(method, "queue_wait_ms", wait * 1000)
+            elapsed = getattr(future, 'wito_exec_time', None)
+            if elapsed is None:
+                elapsed = time.perf_counter() - started - (wait or 0)
+            self.record(method, "exec_ms", elapsed * 1000)
+            if future.cancelled() or isinstance(future.exception(), CancelledError):
+                self.cancel(method)
+            elif future.exception() is not None or isinstance(future.result(), ErrorResult):
+                # @thread methods report exceptions as an {"error": message} result
+                self.error(method)
+
+        if self.enabled:
+            future.add_done_callback(on_done)
+
+    def snapshot(self):
+        with self.lock:
+            return {method: stats.to_dict() for method, stats in self.methods.items()}
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+
+    def dump(self, path):
+        """Append a timestamped snapshot as one JSON line to `path`."""
+        with open(path, 'a') as f:
+            f.write(json.dumps({"time": time.time(), "methods": self.snapshot()}) + '\n')
+
+    def start_dump(self, path, interval):
+        """Dump a snapshot to `path` every `interval` seconds from a daemon thread."""
+        self.stop_dump()
+        stop = self.dump_stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    log.error("Error writing bridge stats: %s", e)
+
+        threading.Thread(target=run, name="wito-stats-dump", daemon=True).start()
+
+    def stop_dump(self):
+        if self.dump_stop is not None:
+            self.dump_stop.set()
+            self.dump_stop = None
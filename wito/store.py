@@ -0,0 +1,249 @@
+import copy
+import threading
+from collections.abc import MutableMapping, MutableSequence
+from gi.repository import GLib
+
+
+def escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def pointer(path):
+    """JSON Pointer for a list of keys, '' for the root."""
+    return ''.join(f'/{escape(key)}' for key in path)
+
+
+def parse_pointer(value):
+    if value == '':
+        return []
+    if not value.startswith('/'):
+        raise ValueError(f"Invalid store path '{value}'")
+    return [part.replace('~1', '/').replace('~0', '~') for part in value[1:].split('/')]
+
+
+class _Tracked:
+    __slots__ = ('_store', '_path', '_data')
+
+    def __init__(self, store, path, data):
+        self._store = store
+        self._path = path
+        self._data = data
+
+    def __eq__(self, other):
+        return self._data == (other._data if isinstance(other, _Tracked) else other)
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def unwrap(self):
+        """The plain dict or list behind this view, changes to it are not tracked."""
+        return self._data
+
+
+class TrackedDict(_Tracked, MutableMapping):
+    """Dict view into the store that records every change as a patch operation."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self._store._wrap(self._path + [key], self._data[key])
+
+    def __setitem__(self, key, value):
+        value = _plain(value)
+        with self._store.lock:
+            op = 'replace' if key in self._data else 'add'
+            self._data[key] = value
+            self._store._record(op, self._path + [key], value)
+
+    def __delitem__(self, key):
+        with self._store.lock:
+            del self._data[key]
+            self._store._record('remove', self._path + [key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def setdefault(self, key, default=None):
+        with self._store.lock:
+            if key not in self._data:
+                self[key] = default
+            return self[key]
+
+
+class TrackedList(_Tracked, MutableSequence):
+    """List view into the store that records every change as a patch operation."""
+
+    __slots__ = ()
+
+    def _index(self, index):
+        if index < 0:
+            index += len(self._data)
+        if not 0 <= index < len(self._data):
+            raise IndexError("list index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_plain(item) for item in self._data[index]]
+        index = self._index(index)
+        return self._store._wrap(self._path + [index], self._data[index])
+
+    def __setitem__(self, index, value):
+        with self._store.lock:
+            if isinstance(index, slice):
+                self._data[index] = [_plain(item) for item in value]
+                self._store._record('replace', self._path, self._data)
+                return
+            index = self._index(index)
+            value = _plain(value)
+            self._data[index] = value
+            self._store._record('replace', self._path + [index], value)
+
+    def __delitem__(self, index):
+        with self._store.lock:
+            if isinstance(index, slice):
+                del self._data[index]
+                self._store._record('replace', self._path, self._data)
+                return
+            index = self._index(index)
+            del self._data[index]
+            self._store._record('remove', self._path + [index])
+
+    def __len__(self):
+        return len(self._data)
+
+    def insert(self, index, value):
+        value = _plain(value)
+        with self._store.lock:
+            size = len(self._data)
+            if index < 0:
+                index = max(index + size, 0)
+            self._data.insert(index, value)
+            self._store._record('add', self._path + [index if index < size else '-'], value)
+
+
+def _plain(value):
+    return value.unwrap() if isinstance(value, _Tracked) else value
+
+
+class Store(TrackedDict):
+    """Shared state mirrored in the page as `wito.store`.
+
+    Changes made through the store, including nested dicts and lists read
+    from it, are recorded as JSON Patch operations and sent to JavaScript in
+    one batch per main loop iteration, so the cost of an update depends on
+    the size of the change rather than the size of the state. Writes made in
+    JavaScript are applied here and passed to `subscribe` callbacks.
+
+    Example:
+        ```python
+        class MyApp(API):
+            @API.expose
+            def add_todo(self, text):
+                self.store.setdefault('todos', []).append({'text': text, 'done': False})
+        ```
+
+        ```javascript
+        wito.store.subscribe((state, ops) => render(state.todos));
+        wito.store.set('/todos/0/done', true); // applied in Python as well
+        ```
+
+    Note:
+        - Objects become part of the store when assigned, later changes made to
+          them directly instead of through the store are not sent to the page
+        - Keys are sent as strings, values are encoded with the bridge serializer
+        - The full state is sent to the page when it finishes loading
+        - Safe to change from any thread
+    """
+
+    __slots__ = ('bridge', 'lock', 'pending', 'scheduled', 'subscribers')
+
+    def __init__(self, bridge, initial=None):
+        self.bridge = bridge
+        self.lock = threading.RLock()
+        self.pending = []
+        self.scheduled = False
+        self.subscribers = []
+        super().__init__(self, [], copy.deepcopy(initial) if initial else {})
+
+    def _wrap(self, path, value):
+        if isinstance(value, dict):
+            return TrackedDict(self, path, value)
+        if isinstance(value, list):
+            return TrackedList(self, path, value)
+        return value
+
+    def _record(self, op, path, value=None):
+        entry = {"op": op, "path": pointer(path)}
+        if op != 'remove':
+            # Later changes to the stored object must not leak into this operation
+            entry["value"] = copy.deepcopy(value)
+        last = self.pending[-1] if self.pending else None
+        if op == 'replace' and last and last["path"] == entry["path"] and last["op"] != 'remove':
+            last["value"] = entry["value"]
+        else:
+            self.pending.append(entry)
+        if not self.scheduled:
+            self.scheduled = True
+            GLib.idle_add(self.flush)
+
+    def flush(self):
+        with self.lock:
+            ops = self.pending
+            self.pending = []
+            self.scheduled = False
+        if ops:
+            self.bridge.deliver('s', None, ops)
+        return False
+
+    def sync(self):
+        """Send the whole state to the page, replacing any queued operations."""
+        with self.lock:
+            self.pending = []
+            self._record('replace', [], self._data)
+
+    def subscribe(self, callback):
+        """Call `callback(ops)` on the main loop after writes from JavaScript are applied."""
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def apply(self, ops):
+        """Apply JSON Patch operations sent by the page."""
+        with self.lock:
+            for entry in ops:
+                self._apply_op(entry["op"], parse_pointer(entry["path"]), entry.get("value"))
+        for callback in list(self.subscribers):
+            callback(ops)
+
+    def _apply_op(self, op, path, value):
+        if not path:
+            if op == 'remove' or not isinstance(value, dict):
+                raise ValueError("The store root must be an object")
+            self._data.clear()
+            self._data.update(value)
+            return
+        parent = self._data
+        for key in path[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+        key = path[-1]
+        if isinstance(parent, list):
+            if key == '-':
+                parent.append(value)
+                return
+            index = int(key)
+            if op == 'add':
+                parent.insert(index, value)
+            elif op == 'replace':
+                parent[index] = value
+            else:
+                del parent[index]
+        elif op == 'remove':
+            parent.pop(key, None)
+        else:
+            parent[key] = value
@@ -0,0 +1,84 @@
+import inspect
+import threading
+from wito import aio
+
+
+STREAMING = object()
+DEFAULT_WINDOW = 16
+
+
+def is_stream(value):
+    return inspect.isgenerator(value) or inspect.isasyncgen(value)
+
+
+def collect(iterator):
+    """Consume a generator result into a list."""
+    if inspect.isasyncgen(iterator):
+        iterator = iterate_async(iterator)
+    return list(iterator)
+
+
+def iterate_async(agen):
+    """Drive an async generator on the shared asyncio loop from a plain thread."""
+    try:
+        while True:
+            try:
+                yield aio.submit(agen.__anext__()).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        aio.submit(agen.aclose()).result()
+
+
+class ResultStream:
+    """Pushes the chunks of a generator result to JavaScript as they are produced.
+
+    The generator runs on its own thread so long-lived streams, such as a log
+    tail, do not hold a worker of the shared executor. Flow control is credit
+    based: the producer may run `window` chunks ahead of the page and then
+    waits until JavaScript acknowledges consumed chunks, so a slow page never
+    makes Python buffer unbounded data.
+    """
+
+    def __init__(self, bridge, call_id, iterator, window=DEFAULT_WINDOW):
+        self.bridge = bridge
+        self.call_id = call_id
+        self.iterator = iterate_async(iterator) if inspect.isasyncgen(iterator) else iterator
+        self.credits = window
+        self.cancelled = False
+        self.condition = threading.Condition()
+
+    def start(self):
+        threading.Thread(target=self.run, name=f"wito-stream-{self.call_id}", daemon=True).start()
+
+    def run(self):
+        try:
+            for chunk in self.iterator:
+                if not self.wait_for_credit():
+                    break
+                self.bridge.deliver('c', self.call_id, chunk)
+            else:
+                self.bridge.deliver('d', self.call_id, None)
+        except Exception as e:
+            self.bridge.deliver('e', self.call_id, str(e))
+        finally:
+            if self.cancelled:
+                self.iterator.close()
+            self.bridge.streams.pop(self.call_id, None)
+
+    def wait_for_credit(self):
+        with self.condition:
+            while self.credits <= 0 and not self.cancelled:
+                self.condition.wait()
+            self.credits -= 1
+            return not self.cancelled
+
+    def ack(self, count):
+        with self.condition:
+            self.credits += count
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify()
@@ -0,0 +1,278 @@
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+
+class CancelToken:
+    """Cooperative cancellation flag for work running on a thread.
+
+    A token is created for every @thread call and cancelled when the page
+    aborts the call, navigates away or the call times out. Long running
+    methods check it between units of work to stop early.
+
+    Example:
+        ```python
+        @API.expose
+        @API.thread(timeout=30)
+        def search(self, query):
+            token = API.cancel_token()
+            for path in paths:
+                token.raise_if_cancelled()
+                scan(path, query)
+        ```
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """Sleep up to `timeout` seconds, returning True early if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError()
+
+
+_NEVER_CANCELLED = CancelToken()
+_current_token = contextvars.ContextVar('wito_cancel_token', default=_NEVER_CANCELLED)
+
+
+def current_cancel_token():
+    """Token of the call running on this thread, a never cancelled token outside calls."""
+    return _current_token.get()
+
+
+def submit_with_token(submit, fn, timeout=None):
+    """Submit `fn` with a fresh CancelToken bound for the duration of the call.
+
+    `submit` takes a zero argument callable and returns a Future, such as
+    `executor.submit` or a bound `TaskPool.submit`. The token and timeout
+    travel on the returned Future as `wito_cancel_token` and `wito_timeout`,
+    where the bridge picks them up.
+    """
+    token = CancelToken()
+    context = contextvars.copy_context()
+    context.run(_current_token.set, token)
+    future = submit(lambda: context.run(fn))
+    if not hasattr(future, 'wito_cancel_token'):
+        # Coalesced calls share the Future, and the token, of the queued call
+        future.wito_cancel_token = token
+        future.wito_timeout = timeout
+    return future
+
+
+def cancel_future(future):
+    """Drop one caller of `future`, the work is cancelled once no caller is left."""
+    callers = getattr(future, 'wito_callers', 1) - 1
+    future.wito_callers = callers
+    if callers > 0:
+        # Coalesced calls share the Future, the others still wait for its result
+        return
+    token = getattr(future, 'wito_cancel_token', None)
+    if token is not None:
+        token.cancel()
+    future.cancel()
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class ErrorResult(dict):
+    """`{"error": message}` result of a @thread call that raised, counted as an error in the stats."""
+
+    def __init__(self, message):
+        super().__init__(error=message)
+
+
+class MethodLimits:
+    """Concurrency and queueing limits shared by every call of one @thread method.
+
+    Args:
+        name (str): Method name used in error messages.
+        max_concurrent (int, optional): Calls of the method allowed to run at once.
+        queue_limit (int, optional): Calls allowed to wait in the queue.
+        on_full (str): 'reject' fails new calls while the queue is full,
+            'coalesce' hands them the pending result of an identical queued call
+            and rejects them if there is none.
+    """
+
+    def __init__(self, name, max_concurrent=None, queue_limit=None, on_full='reject'):
+        if on_full not in ('reject', 'coalesce'):
+            raise ValueError(f"on_full must be 'reject' or 'coalesce', not {on_full!r}")
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue_limit = queue_limit
+        self.on_full = on_full
+        self.running = 0
+        self.queued = 0
+        self.pending = {}
+
+    def can_start(self):
+        return self.max_concurrent is None or self.running < self.max_concurrent
+
+    def is_full(self):
+        return self.queue_limit is not None and self.queued >= self.queue_limit
+
+
+class _Job:
+    __slots__ = ('fn', 'future', 'limits', 'key', 'enqueued')
+
+    def __init__(self, fn, limits, key):
+        self.fn = fn
+        self.future = Future()
+        self.future.wito_callers = 1
+        self.limits = limits
+        self.key = key
+        self.enqueued = time.monotonic()
+
+
+class TaskPool:
+    """Thread pool with priorities, per-method limits and queue statistics.
+
+    Jobs wait in a priority queue and are only handed to the underlying
+    ThreadPoolExecutor when a worker is free and the method's own
+    `max_concurrent` allows it, so a burst of slow calls cannot starve
+    latency sensitive calls queued behind them.
+    """
+
+    def __init__(self, name, workers, executor=None):
+        self.name = name
+        self.workers = workers
+        self.executor = executor or ThreadPoolExecutor(workers, thread_name_prefix=f"wito-{name}")
+        self.lock = threading.Lock()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def submit(self, fn, priority='normal', limits=None, key=None):
+        with self.lock:
+            if limits and limits.is_full():
+                shared = limits.pending.get(key) if key is not None and limits.on_full == 'coalesce' else None
+                if shared is not None and not shared.future.cancelled():
+                    self.coalesced += 1
+                    shared.future.wito_callers += 1
+                    return shared.future
+                self.rejected += 1
+                raise QueueFullError(f"Queue for '{limits.name}' is full")
+
+            job = _Job(fn, limits, key)
+            heapq.heappush(self.queue, (PRIORITIES[priority], next(self.sequence), job))
+            if limits:
+                limits.queued += 1
+                if key is not None:
+                    limits.pending[key] = job
+            self.submitted += 1
+            ready = self._take_ready()
+        self._start(ready)
+        return job.future
+
+    def _take_ready(self):
+        ready = []
+        blocked = []
+        while self.queue and self.running < self.workers:
+            item = heapq.heappop(self.queue)
+            job = item[2]
+            if job.limits and not job.limits.can_start() and not job.future.cancelled():
+                blocked.append(item)
+                continue
+            if job.limits:
+                job.limits.queued -= 1
+                if job.key is not None and job.limits.pending.get(job.key) is job:
+                    del job.limits.pending[job.key]
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            wait = time.monotonic() - job.enqueued
+            job.future.wito_queue_wait = wait
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.running += 1
+            if job.limits:
+                job.limits.running += 1
+            ready.append(job)
+        for item in blocked:
+            heapq.heappush(self.queue, item)
+        return ready
+
+    def _start(self, jobs):
+        for job in jobs:
+            self.executor.submit(self._run, job)
+
+    def _run(self, job):
+        started = time.perf_counter()
+        try:
+            result = job.fn()
+        except BaseException as e:
+            job.future.wito_exec_time = time.perf_counter() - started
+            job.future.set_exception(e)
+        else:
+            job.future.wito_exec_time = time.perf_counter() - started
+            job.future.set_result(result)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.completed += 1
+                if job.limits:
+                    job.limits.running -= 1
+                ready = self._take_ready()
+            self._start(ready)
+
+    def stats(self):
+        with self.lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.workers,
+                "running": self.running,
+                "queued": len(self.queue),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "coalesced": self.coalesced,
+                "wait_avg_ms": self.wait_total / started * 1000 if started else 0.0,
+                "wait_max_ms": self.wait_max * 1000
+            }
+
+
+_pools = {}
+
+
+def register_pool(pool):
+    _pools[pool.name] = pool
+    return pool
+
+
+def get_pool(name):
+    try:
+        return _pools[name]
+    except KeyError:
+        raise ValueError(f"Unknown thread pool '{name}', declare it under 'pools' in wito-config.json") from None
+
+
+def configure_pools(config):
+    """Create the named pools declared in the `pools` config object."""
+    for name, options in (config or {}).items():
+        register_pool(TaskPool(name, options.get("workers", 4)))
+
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in _pools.items()}